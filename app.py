@@ -90,23 +90,28 @@ def show_home_page():
         
         st.markdown('<div class="animate-item">', unsafe_allow_html=True)
         st.markdown("### 📄 Download My CV")
-        cv_link = get_base64_download_link("static/cv.pdf", "AI_Engineer_CV.pdf")
-        st.markdown(cv_link, unsafe_allow_html=True)
+        show_download_button("static/cv.pdf", "AI_Engineer_CV.pdf", "📄 Download CV", mime="application/pdf")
         st.markdown('</div>', unsafe_allow_html=True)
         
 import streamlit as st
-import json
 import os
-from datetime import datetime
-import sqlite3
+from datetime import datetime, timezone
 import hashlib
-import pandas as pd
-from PIL import Image
-import base64
-import io
-import markdown
+import html
+import logging
 import re
 from pathlib import Path
+import time
+import uuid
+
+from database import DEFAULT_DB_PATH, migrate, open_pool
+from images import ACCEPTED_TYPES, ImageError, ThumbnailPool, store_original, variant_path
+from ratelimit import DedupWindow, TokenBucketLimiter
+from repository import COUNTED_TABLES, SNIPPET_END, SNIPPET_START, Repositories, parse_tags, refresh_post_excerpts
+import perf
+import bulk
+from site_export import SiteWriter, source_hash
+from snapshot import SnapshotStore
 
 # Page configuration
 st.set_page_config(
@@ -117,619 +122,100 @@ st.set_page_config(
 )
 
 # Custom CSS for professional styling
+THEME_CSS = "static/theme.css"
+
+def minify_css(css):
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,>])\s*', r'\1', css)
+    css = re.sub(r':\s+', ':', css)
+    return css.replace(';}', '}').strip()
+
+@st.cache_resource(max_entries=4)
+def build_theme_bundle(source_path, mtime_ns):
+    """Minify the theme once per source change and write it under a content-hashed name"""
+    with open(source_path, encoding="utf-8") as f:
+        source = f.read()
+    css = minify_css(source)
+    digest = hashlib.sha256(css.encode()).hexdigest()[:12]
+    bundle_path = Path("static") / f"theme.{digest}.css"
+    if not bundle_path.exists():
+        for stale in Path("static").glob("theme.*.css"):
+            if stale.name != "theme.css":
+                stale.unlink(missing_ok=True)
+        bundle_path.write_text(css, encoding="utf-8")
+    return {"css": css, "url": f"app/static/{bundle_path.name}", "source_bytes": len(source.encode())}
+
+def theme_markup():
+    bundle = build_theme_bundle(THEME_CSS, os.stat(THEME_CSS).st_mtime_ns)
+    if st.get_option("server.enableStaticServing"):
+        # The browser fetches the hashed file once and reuses it on every rerun
+        return f'<link rel="stylesheet" href="{bundle["url"]}">'
+    return f"<style>{bundle['css']}</style>"
+
+def theme_payload_stats():
+    """Bytes the theme adds to each rerun now, against inlining the unminified CSS in a <style> tag"""
+    inline_bytes = os.path.getsize(THEME_CSS) + len("<style></style>")
+    rerun_bytes = len(theme_markup().encode())
+    return {"inline_bytes": inline_bytes, "rerun_bytes": rerun_bytes, "saved_bytes": inline_bytes - rerun_bytes}
+
+@perf.timed("theme")
 def load_css():
-    st.markdown("""
-    <style>
-    @import url('https://fonts.googleapis.com/css2?family=Inter:wght@300;400;500;600;700&display=swap');
-    
-    .main {
-        padding-top: 0rem;
-    }
-    
-    .stApp {
-        font-family: 'Inter', sans-serif;
-    }
-    
-    /* Hero section styling */
-    .hero-container {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 4rem 2rem;
-        border-radius: 20px;
-        margin-bottom: 2rem;
-        color: white;
-        text-align: center;
-        animation: fadeInUp 1s ease-out;
-    }
-    
-    .hero-title {
-        font-size: 3.5rem;
-        font-weight: 700;
-        margin-bottom: 1rem;
-        animation: slideInLeft 1s ease-out;
-    }
-    
-    .hero-subtitle {
-        font-size: 1.5rem;
-        font-weight: 300;
-        margin-bottom: 2rem;
-        animation: slideInRight 1s ease-out;
-    }
-    
-    /* Enhanced card styling with click animations */
-    .project-card {
-        background: white;
-        border-radius: 15px;
-        padding: 2rem;
-        box-shadow: 0 10px 30px rgba(0,0,0,0.1);
-        margin-bottom: 2rem;
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-        border: 1px solid #e2e8f0;
-        cursor: pointer;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .project-card:before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(102, 126, 234, 0.1) 0%, transparent 70%);
-        transform: scale(0);
-        transition: transform 0.6s ease-out;
-        z-index: 1;
-    }
-    
-    .project-card:hover {
-        transform: translateY(-8px) scale(1.02);
-        box-shadow: 0 25px 50px rgba(0,0,0,0.2);
-        border-color: #667eea;
-    }
-    
-    .project-card:hover:before {
-        transform: scale(1);
-    }
-    
-    .project-card:active {
-        transform: translateY(-4px) scale(1.01);
-        box-shadow: 0 15px 30px rgba(0,0,0,0.15);
-    }
-    
-    .blog-card {
-        background: white;
-        border-radius: 12px;
-        padding: 1.5rem;
-        box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-        margin-bottom: 1.5rem;
-        transition: all 0.4s cubic-bezier(0.4, 0, 0.2, 1);
-        border-left: 4px solid #667eea;
-        cursor: pointer;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .blog-card:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(102, 126, 234, 0.1), transparent);
-        transition: left 0.5s ease;
-    }
-    
-    .blog-card:hover {
-        transform: translateX(8px) scale(1.02);
-        box-shadow: 0 12px 35px rgba(0,0,0,0.15);
-        border-left-color: #5a67d8;
-    }
-    
-    .blog-card:hover:before {
-        left: 100%;
-    }
-    
-    .blog-card:active {
-        transform: translateX(4px) scale(1.01);
-        box-shadow: 0 8px 20px rgba(0,0,0,0.12);
-    }
-    
-    /* Button styling with enhanced animations */
-    .download-btn {
-        background: linear-gradient(45deg, #667eea, #764ba2);
-        color: white;
-        padding: 0.75rem 2rem;
-        border-radius: 50px;
-        text-decoration: none;
-        font-weight: 600;
-        display: inline-block;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        border: none;
-        cursor: pointer;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .download-btn:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-        transition: left 0.5s;
-    }
-    
-    .download-btn:hover {
-        transform: translateY(-3px) scale(1.05);
-        box-shadow: 0 15px 30px rgba(102, 126, 234, 0.4);
-    }
-    
-    .download-btn:hover:before {
-        left: 100%;
-    }
-    
-    .download-btn:active {
-        transform: translateY(-1px) scale(1.02);
-        box-shadow: 0 8px 15px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Enhanced Streamlit button animations */
-    .stButton > button {
-        background: linear-gradient(45deg, #667eea, #764ba2) !important;
-        color: white !important;
-        border: none !important;
-        border-radius: 12px !important;
-        font-weight: 600 !important;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        position: relative !important;
-        overflow: hidden !important;
-    }
-    
-    .stButton > button:hover {
-        transform: translateY(-2px) scale(1.02) !important;
-        box-shadow: 0 8px 25px rgba(102, 126, 234, 0.3) !important;
-        background: linear-gradient(45deg, #5a67d8, #6b46c1) !important;
-    }
-    
-    .stButton > button:active {
-        transform: translateY(0px) scale(0.98) !important;
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.2) !important;
-    }
-    
-    .stButton > button:before {
-        content: '';
-        position: absolute;
-        top: 50%;
-        left: 50%;
-        width: 0;
-        height: 0;
-        border-radius: 50%;
-        background: rgba(255, 255, 255, 0.3);
-        transition: width 0.6s, height 0.6s;
-        transform: translate(-50%, -50%);
-        z-index: 0;
-    }
-    
-    .stButton > button:active:before {
-        width: 300px;
-        height: 300px;
-    }
-    
-    /* Animations */
-    @keyframes fadeInUp {
-        from {
-            opacity: 0;
-            transform: translateY(30px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    @keyframes slideInLeft {
-        from {
-            opacity: 0;
-            transform: translateX(-50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    @keyframes slideInRight {
-        from {
-            opacity: 0;
-            transform: translateX(50px);
-        }
-        to {
-            opacity: 1;
-            transform: translateX(0);
-        }
-    }
-    
-    /* Skills section */
-    .skill-tag {
-        background: linear-gradient(45deg, #667eea, #764ba2);
-        color: white;
-        padding: 0.5rem 1rem;
-        border-radius: 25px;
-        display: inline-block;
-        margin: 0.25rem;
-        font-size: 0.9rem;
-        font-weight: 500;
-    }
-    
-    /* Contact form */
-    .contact-form {
-        background: #f8fafc;
-        padding: 2rem;
-        border-radius: 15px;
-        margin-top: 2rem;
-    }
-    
-    /* Enhanced navigation animations */
-    .nav-link {
-        padding: 0.5rem 1rem;
-        margin: 0 0.25rem;
-        border-radius: 8px;
-        text-decoration: none;
-        color: #4a5568;
-        font-weight: 500;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .nav-link:before {
-        content: '';
-        position: absolute;
-        top: 0;
-        left: -100%;
-        width: 100%;
-        height: 100%;
-        background: linear-gradient(90deg, transparent, rgba(102, 126, 234, 0.1), transparent);
-        transition: left 0.4s ease;
-    }
-    
-    .nav-link:hover {
-        background: #667eea;
-        color: white;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.3);
-    }
-    
-    .nav-link:hover:before {
-        left: 100%;
-    }
-    
-    .nav-link:active {
-        transform: translateY(0px) scale(0.98);
-    }
-    
-    .nav-link.active {
-        background: #667eea;
-        color: white;
-        box-shadow: 0 4px 12px rgba(102, 126, 234, 0.3);
-    }
-    
-    /* Enhanced input field animations */
-    .stTextInput > div > div > input,
-    .stTextArea > div > div > textarea,
-    .stSelectbox > div > div > select {
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1) !important;
-        border: 2px solid #e2e8f0 !important;
-        border-radius: 8px !important;
-    }
-    
-    .stTextInput > div > div > input:focus,
-    .stTextArea > div > div > textarea:focus,
-    .stSelectbox > div > div > select:focus {
-        border-color: #667eea !important;
-        box-shadow: 0 0 0 3px rgba(102, 126, 234, 0.1) !important;
-        transform: scale(1.02) !important;
-    }
-    
-    /* Click ripple effect */
-    .ripple {
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .ripple:before {
-        content: '';
-        position: absolute;
-        top: 50%;
-        left: 50%;
-        width: 0;
-        height: 0;
-        border-radius: 50%;
-        background: rgba(255, 255, 255, 0.5);
-        transform: translate(-50%, -50%);
-        transition: width 0.6s, height 0.6s;
-    }
-    
-    .ripple:active:before {
-        width: 300px;
-        height: 300px;
-    }
-    
-    /* Page transition animations */
-    .page-content {
-        animation: pageSlideIn 0.5s cubic-bezier(0.4, 0, 0.2, 1);
-    }
-    
-    @keyframes pageSlideIn {
-        from {
-            opacity: 0;
-            transform: translateY(20px);
-        }
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    /* Staggered animation for lists */
-    .animate-item {
-        animation: itemFadeInUp 0.6s cubic-bezier(0.4, 0, 0.2, 1) forwards;
-        opacity: 0;
-        transform: translateY(30px);
-    }
-    
-    .animate-item:nth-child(1) { animation-delay: 0.1s; }
-    .animate-item:nth-child(2) { animation-delay: 0.2s; }
-    .animate-item:nth-child(3) { animation-delay: 0.3s; }
-    .animate-item:nth-child(4) { animation-delay: 0.4s; }
-    .animate-item:nth-child(5) { animation-delay: 0.5s; }
-    
-    @keyframes itemFadeInUp {
-        to {
-            opacity: 1;
-            transform: translateY(0);
-        }
-    }
-    
-    /* Loading animation */
-    .loading-spinner {
-        display: inline-block;
-        width: 20px;
-        height: 20px;
-        border: 3px solid rgba(255,255,255,.3);
-        border-radius: 50%;
-        border-top-color: #fff;
-        animation: spin 1s ease-in-out infinite;
-    }
-    
-    @keyframes spin {
-        to { transform: rotate(360deg); }
-    }
-    
-    /* Pulse animation for important elements */
-    .pulse-animation {
-        animation: pulse 2s cubic-bezier(0.4, 0, 0.6, 1) infinite;
-    }
-    
-    @keyframes pulse {
-        0%, 100% {
-            opacity: 1;
-        }
-        50% {
-            opacity: .8;
-            transform: scale(1.05);
-        }
-    }
-    
-    /* Metric card animations */
-    .metric-card {
-        background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-        padding: 1.5rem;
-        border-radius: 15px;
-        color: white;
-        text-align: center;
-        transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-        cursor: pointer;
-        position: relative;
-        overflow: hidden;
-    }
-    
-    .metric-card:before {
-        content: '';
-        position: absolute;
-        top: -50%;
-        left: -50%;
-        width: 200%;
-        height: 200%;
-        background: radial-gradient(circle, rgba(255, 255, 255, 0.1) 0%, transparent 70%);
-        transform: scale(0);
-        transition: transform 0.5s ease-out;
-    }
-    
-    .metric-card:hover {
-        transform: translateY(-5px) scale(1.05);
-        box-shadow: 0 15px 35px rgba(102, 126, 234, 0.4);
-    }
-    
-    .metric-card:hover:before {
-        transform: scale(1);
-    }
-    
-    .metric-card:active {
-        transform: translateY(-2px) scale(1.02);
-    }
-    </style>
-    
-    <script>
-    // Enhanced animation and interaction JavaScript
-    document.addEventListener('DOMContentLoaded', function() {
-        // Add ripple effect to all buttons
-        function createRipple(event) {
-            const button = event.currentTarget;
-            const circle = document.createElement('span');
-            const diameter = Math.max(button.clientWidth, button.clientHeight);
-            const radius = diameter / 2;
-            
-            circle.style.width = circle.style.height = diameter + 'px';
-            circle.style.left = event.clientX - button.offsetLeft - radius + 'px';
-            circle.style.top = event.clientY - button.offsetTop - radius + 'px';
-            circle.classList.add('ripple-effect');
-            
-            const ripple = button.getElementsByClassName('ripple-effect')[0];
-            if (ripple) {
-                ripple.remove();
-            }
-            
-            button.appendChild(circle);
-            
-            setTimeout(() => {
-                circle.remove();
-            }, 600);
-        }
-        
-        // Add click animations to all interactive elements
-        function addClickAnimations() {
-            // Add ripple to buttons
-            const buttons = document.querySelectorAll('button, .download-btn, .nav-link');
-            buttons.forEach(button => {
-                button.addEventListener('click', createRipple);
-                button.style.position = 'relative';
-                button.style.overflow = 'hidden';
-            });
-            
-            // Add bounce effect to cards
-            const cards = document.querySelectorAll('.project-card, .blog-card, .metric-card');
-            cards.forEach(card => {
-                card.addEventListener('click', function() {
-                    this.style.animation = 'none';
-                    this.offsetHeight; // Trigger reflow
-                    this.style.animation = 'cardBounce 0.4s cubic-bezier(0.4, 0, 0.2, 1)';
-                });
-            });
-            
-            // Add stagger animation to lists
-            const listItems = document.querySelectorAll('.project-card, .blog-card');
-            listItems.forEach((item, index) => {
-                item.classList.add('animate-item');
-                item.style.animationDelay = (index * 0.1) + 's';
-            });
-            
-            // Add hover sound effect simulation (visual feedback)
-            const interactiveElements = document.querySelectorAll('button, .project-card, .blog-card, input, textarea, select');
-            interactiveElements.forEach(element => {
-                element.addEventListener('mouseenter', function() {
-                    this.style.transform = this.style.transform || '';
-                    if (!this.style.transform.includes('scale')) {
-                        this.style.transform += ' scale(1.02)';
-                    }
-                });
-                
-                element.addEventListener('mouseleave', function() {
-                    this.style.transform = this.style.transform.replace(' scale(1.02)', '');
-                });
-            });
-        }
-        
-        // Smooth scroll effect for navigation
-        function addSmoothScrolling() {
-            const navLinks = document.querySelectorAll('.nav-link');
-            navLinks.forEach(link => {
-                link.addEventListener('click', function(e) {
-                    // Add loading animation
-                    const spinner = document.createElement('span');
-                    spinner.className = 'loading-spinner';
-                    spinner.style.marginLeft = '10px';
-                    this.appendChild(spinner);
-                    
-                    setTimeout(() => {
-                        if (spinner.parentNode) {
-                            spinner.remove();
-                        }
-                    }, 500);
-                });
-            });
-        }
-        
-        // Add floating animation to hero elements
-        function addFloatingAnimation() {
-            const heroElements = document.querySelectorAll('.hero-title, .hero-subtitle');
-            heroElements.forEach(element => {
-                element.addEventListener('mouseenter', function() {
-                    this.style.animation = 'float 2s ease-in-out infinite';
-                });
-                
-                element.addEventListener('mouseleave', function() {
-                    this.style.animation = '';
-                });
-            });
-        }
-        
-        // Initialize all animations
-        addClickAnimations();
-        addSmoothScrolling();
-        addFloatingAnimation();
-        
-        // Re-run animations when content changes (for Streamlit rerun)
-        const observer = new MutationObserver(function(mutations) {
-            mutations.forEach(function(mutation) {
-                if (mutation.type === 'childList') {
-                    setTimeout(addClickAnimations, 100);
-                }
-            });
-        });
-        
-        observer.observe(document.body, {
-            childList: true,
-            subtree: true
-        });
-    });
-    
-    // CSS for JavaScript-triggered animations
-    const style = document.createElement('style');
-    style.textContent = `
-        .ripple-effect {
-            position: absolute;
-            border-radius: 50%;
-            background: rgba(255, 255, 255, 0.6);
-            transform: scale(0);
-            animation: ripple-animation 0.6s linear;
-            pointer-events: none;
-        }
-        
-        @keyframes ripple-animation {
-            to {
-                transform: scale(4);
-                opacity: 0;
-            }
-        }
-        
-        @keyframes cardBounce {
-            0%, 100% { transform: translateY(0) scale(1); }
-            50% { transform: translateY(-10px) scale(1.05); }
-        }
-        
-        @keyframes float {
-            0%, 100% { transform: translateY(0px); }
-            50% { transform: translateY(-10px); }
-        }
-        
-        /* Enhanced button glow effect */
-        button:focus, .download-btn:focus {
-            outline: none !important;
-            box-shadow: 0 0 20px rgba(102, 126, 234, 0.6) !important;
-        }
-    `;
-    document.head.appendChild(style);
-    </script>
-    """, unsafe_allow_html=True)
+    st.markdown(theme_markup(), unsafe_allow_html=True)
 
-# Database initialization
-def init_database():
-    conn = sqlite3.connect('portfolio.db')
+# sqlite:///path/to.db or memory://name; PORTFOLIO_DB still takes a plain file path
+DSN = os.environ.get('PORTFOLIO_DSN') or os.environ.get('PORTFOLIO_DB', DEFAULT_DB_PATH)
+
+# Shared connection layer, one instance per server process
+@st.cache_resource
+def get_db():
+    return open_pool(DSN)
+
+# All queries go through the repositories; pages never build SQL
+@st.cache_resource
+def get_repos():
+    return Repositories(get_db(), render_post_excerpt)
+
+# Public pages read one shared in-memory snapshot; lists longer than this go to SQL past its end
+SNAPSHOT_MAX_ROWS = int(os.environ.get('PORTFOLIO_SNAPSHOT_MAX_ROWS', 2000))
+
+@st.cache_resource(on_release=SnapshotStore.close)
+def get_snapshots():
+    init_database()
+    repos = get_repos()
+    # Posts edited outside the app keep updated_at moving past their excerpt; catch up now and on every change
+    repos.posts.refresh_excerpts()
+    store = SnapshotStore(repos, SNAPSHOT_MAX_ROWS, EXCERPT_LENGTH)
+    store.listeners.append(lambda snapshot: repos.posts.refresh_excerpts())
+    return store
+
+# Related posts come from a TF-IDF index saved next to the database; memory:// databases keep it in memory
+RELATED_INDEX_PATH = os.environ.get('PORTFOLIO_RELATED_INDEX', 'related_index.npz')
+RELATED_POSTS = 3
+
+def close_related(index):
+    index.close()
+
+@st.cache_resource(on_release=close_related)
+def get_related():
+    # Imported here: numpy is only loaded once someone opens the blog
+    from related import RelatedIndex
+    index = RelatedIndex(get_repos().posts, None if DSN.startswith('memory://') else RELATED_INDEX_PATH)
+    # Every published content change queues an incremental sync; the first one catches up after a restart
+    get_snapshots().listeners.append(index.schedule_sync)
+    index.schedule_sync()
+    return index
+
+# Schema migrations, applied in order; migration N takes PRAGMA user_version from N-1 to N.
+# Append new steps to MIGRATIONS, never edit a released one. Every step tolerates objects that
+# already exist, because databases created before versioning are at user_version 0.
+def _column_names(conn, table):
+    return [column[1] for column in conn.execute(f'PRAGMA table_info({table})').fetchall()]
+
+def _table_exists(conn, name):
+    return conn.execute('SELECT 1 FROM sqlite_master WHERE name = ?', (name,)).fetchone() is not None
+
+def migrate_base_schema(conn):
     cursor = conn.cursor()
     
     # Create projects table
@@ -786,226 +272,803 @@ def init_database():
         password_hash = hashlib.sha256('admin123'.encode()).hexdigest()
         cursor.execute('INSERT INTO admin_users (username, password_hash) VALUES (?, ?)', 
                       ('admin', password_hash))
-    
-    conn.commit()
-    conn.close()
 
-# Authentication functions
-def authenticate_admin(username, password):
-    conn = sqlite3.connect('portfolio.db')
-    cursor = conn.cursor()
-    password_hash = hashlib.sha256(password.encode()).hexdigest()
-    cursor.execute('SELECT id FROM admin_users WHERE username = ? AND password_hash = ?', 
-                  (username, password_hash))
-    result = cursor.fetchone()
-    conn.close()
-    return result is not None
+def migrate_blog_fts(conn):
+    # Full-text index over blog posts, kept in sync by triggers
+    fts_exists = _table_exists(conn, 'blog_posts_fts')
+    conn.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS blog_posts_fts USING fts5(
+            title, content, tags,
+            content='blog_posts', content_rowid='id',
+            tokenize='porter unicode61', prefix='2 3'
+        )
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ai AFTER INSERT ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts (rowid, title, content, tags)
+            VALUES (new.id, new.title, new.content, new.tags);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_ad AFTER DELETE ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, content, tags)
+            VALUES ('delete', old.id, old.title, old.content, old.tags);
+        END
+    ''')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS blog_posts_fts_au AFTER UPDATE OF title, content, tags ON blog_posts BEGIN
+            INSERT INTO blog_posts_fts (blog_posts_fts, rowid, title, content, tags)
+            VALUES ('delete', old.id, old.title, old.content, old.tags);
+            INSERT INTO blog_posts_fts (rowid, title, content, tags)
+            VALUES (new.id, new.title, new.content, new.tags);
+        END
+    ''')
+    if not fts_exists:
+        # Title and tag hits outrank body hits
+        conn.execute("INSERT INTO blog_posts_fts (blog_posts_fts, rank) VALUES ('rank', 'bm25(10.0, 1.0, 5.0)')")
+        conn.execute("INSERT INTO blog_posts_fts (blog_posts_fts) VALUES ('rebuild')")
+
+def migrate_post_tags(conn):
+    # Normalized tag index, one row per (tag, post)
+    post_tags_exists = _table_exists(conn, 'post_tags')
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS post_tags (
+            tag TEXT NOT NULL COLLATE NOCASE,
+            post_id INTEGER NOT NULL,
+            PRIMARY KEY (tag, post_id)
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_post_tags_post ON post_tags (post_id)')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS blog_posts_tags_ad AFTER DELETE ON blog_posts BEGIN
+            DELETE FROM post_tags WHERE post_id = old.id;
+        END
+    ''')
+    if not post_tags_exists:
+        for post_id, tags in conn.execute('SELECT id, tags FROM blog_posts WHERE tags IS NOT NULL').fetchall():
+            conn.executemany('INSERT INTO post_tags (tag, post_id) VALUES (?, ?)',
+                             [(tag, post_id) for tag in parse_tags(tags)])
+
+def migrate_keyset_indexes(conn):
+    # Keyset pagination indexes for the newest-first listings
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_projects_created ON projects (created_at DESC, id DESC)')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_blog_posts_created ON blog_posts (created_at DESC, id DESC)')
+    # post_tags carries the post's created_at so a tag listing pages through its own index
+    if 'created_at' not in _column_names(conn, 'post_tags'):
+        conn.execute('ALTER TABLE post_tags ADD COLUMN created_at TIMESTAMP')
+        conn.execute('''
+            UPDATE post_tags SET created_at = (
+                SELECT created_at FROM blog_posts WHERE blog_posts.id = post_tags.post_id
+            )
+        ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_post_tags_created ON post_tags (tag, created_at DESC, post_id DESC)')
+
+def migrate_post_excerpts(conn):
+    # Pre-rendered card excerpts; PostsRepo.refresh_excerpts() re-renders them when updated_at moves past
+    # excerpt_updated_at, at startup and after every content change
+    post_columns = _column_names(conn, 'blog_posts')
+    for column, column_type in [('excerpt_html', 'TEXT'), ('word_count', 'INTEGER'),
+                                ('reading_time', 'INTEGER'), ('excerpt_updated_at', 'TIMESTAMP')]:
+        if column not in post_columns:
+            conn.execute(f'ALTER TABLE blog_posts ADD COLUMN {column} {column_type}')
+    conn.execute('''
+        CREATE TRIGGER IF NOT EXISTS blog_posts_touch_au AFTER UPDATE OF title, content ON blog_posts
+        WHEN new.updated_at IS old.updated_at BEGIN
+            UPDATE blog_posts SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+        END
+    ''')
+    refresh_post_excerpts(conn, render_post_excerpt)
+
+def migrate_content_stats(conn):
+    # Row counts kept current by insert/delete triggers, so the Overview never scans a table
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS content_stats (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL DEFAULT 0
+        ) WITHOUT ROWID
+    ''')
+    for table in COUNTED_TABLES:
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_stats_ai AFTER INSERT ON {table} BEGIN
+                UPDATE content_stats SET value = value + 1 WHERE name = '{table}';
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS {table}_stats_ad AFTER DELETE ON {table} BEGIN
+                UPDATE content_stats SET value = value - 1 WHERE name = '{table}';
+            END
+        ''')
+        conn.execute(f'INSERT OR REPLACE INTO content_stats (name, value) SELECT ?, COUNT(*) FROM {table}', (table,))
+    # Recent-activity windows are index range counts, proportional to the window, not the table
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_contact_messages_created ON contact_messages (created_at)')
+
+def migrate_contact_submission_ids(conn):
+    # Lets the contact writer replay its spill file without duplicating messages
+    if 'submission_id' not in _column_names(conn, 'contact_messages'):
+        conn.execute('ALTER TABLE contact_messages ADD COLUMN submission_id TEXT')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_contact_messages_submission ON contact_messages (submission_id)')
+
+def migrate_message_inbox(conn):
+    # NULL read_at means unread, NULL archived_at means in the inbox
+    columns = _column_names(conn, 'contact_messages')
+    for column in ('read_at', 'archived_at'):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE contact_messages ADD COLUMN {column} TIMESTAMP')
+    # Partial indexes, so each inbox view pages through only its own rows in display order
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_contact_messages_inbox
+        ON contact_messages (created_at DESC, id DESC) WHERE archived_at IS NULL
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_contact_messages_unread
+        ON contact_messages (created_at DESC, id DESC) WHERE read_at IS NULL AND archived_at IS NULL
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_contact_messages_archived
+        ON contact_messages (created_at DESC, id DESC) WHERE archived_at IS NOT NULL
+    ''')
 
+def migrate_content_version(conn):
+    # Bumped by every write to the public content, so the snapshot watcher can tell
+    # those commits from the rest, such as new contact messages
+    conn.execute("INSERT OR IGNORE INTO content_stats (name, value) VALUES ('content_version', 0)")
+    for table in ('projects', 'blog_posts'):
+        for event, suffix in (('INSERT', 'ai'), ('UPDATE', 'au'), ('DELETE', 'ad')):
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+                    UPDATE content_stats SET value = value + 1 WHERE name = 'content_version';
+                END
+            ''')
+
+def migrate_touch_on_tags(conn):
+    # Tag edits move updated_at too, so a post retagged outside the app gets its post_tags rows
+    # rewritten by the same refresh that re-renders its excerpt
+    conn.execute('DROP TRIGGER IF EXISTS blog_posts_touch_au')
+    conn.execute('''
+        CREATE TRIGGER blog_posts_touch_au AFTER UPDATE OF title, content, tags ON blog_posts
+        WHEN new.updated_at IS old.updated_at BEGIN
+            UPDATE blog_posts SET updated_at = CURRENT_TIMESTAMP WHERE id = new.id;
+        END
+    ''')
+
+MIGRATIONS = [
+    migrate_base_schema,
+    migrate_blog_fts,
+    migrate_post_tags,
+    migrate_keyset_indexes,
+    migrate_post_excerpts,
+    migrate_content_stats,
+    migrate_contact_submission_ids,
+    migrate_message_inbox,
+    migrate_content_version,
+    migrate_touch_on_tags,
+]
+
+# Database initialization, once per server process rather than on every rerun
+@perf.timed("init_database")
+@st.cache_resource
+def init_database():
+    return migrate(get_db(), MIGRATIONS)
+
+# Blog excerpts
+EXCERPT_LENGTH = 300
+WORDS_PER_MINUTE = 200
+
+def excerpt_markdown(content, length=EXCERPT_LENGTH):
+    """Cut markdown at a block boundary so lists, emphasis and code fences stay intact"""
+    blocks = []
+    current = []
+    in_fence = False
+    for line in content.strip().splitlines():
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                blocks.append('\n'.join(current))
+                current = []
+        else:
+            current.append(line)
+    if current:
+        blocks.append('\n'.join(current))
+    
+    excerpt = []
+    size = 0
+    for block in blocks:
+        if size + len(block) > length:
+            if not excerpt:
+                if block.lstrip().startswith('```'):
+                    fence = block.lstrip()[:3]
+                    excerpt.append(block[:length].rsplit('\n', 1)[0] + '\n' + fence)
+                else:
+                    excerpt.append(block[:length].rsplit(' ', 1)[0] + '…')
+            else:
+                excerpt.append('…')
+            break
+        excerpt.append(block)
+        size += len(block)
+    return '\n\n'.join(excerpt)
+
+@perf.timed("markdown")
+def render_post_excerpt(content):
+    """Return (excerpt_html, word_count, reading_time_minutes) for a post body"""
+    word_count = len(re.findall(r'\w+', content))
+    reading_time = max(1, round(word_count / WORDS_PER_MINUTE))
+    # Only admin writes and migrations render markdown, so visitors' processes never import it
+    import markdown
+    return markdown.markdown(excerpt_markdown(content)), word_count, reading_time
+
+# Authentication functions
 def is_admin_logged_in():
     return st.session_state.get('admin_logged_in', False)
 
-# Data access functions
-def get_projects():
-    conn = sqlite3.connect('portfolio.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM projects ORDER BY created_at DESC')
-    projects = cursor.fetchall()
-    conn.close()
-    return projects
+# Page sizes: public "load more" lists and admin grids
+PAGE_SIZE = int(os.environ.get('PORTFOLIO_PAGE_SIZE', 10))
+ADMIN_PAGE_SIZES = [25, 50, 100]
 
-def get_blog_posts(search_term=None, tag_filter=None):
-    conn = sqlite3.connect('portfolio.db')
-    cursor = conn.cursor()
-    
-    query = 'SELECT * FROM blog_posts'
-    params = []
-    
-    if search_term or tag_filter:
-        query += ' WHERE '
-        conditions = []
-        
-        if search_term:
-            conditions.append('(title LIKE ? OR content LIKE ?)')
-            params.extend([f'%{search_term}%', f'%{search_term}%'])
-        
-        if tag_filter:
-            conditions.append('tags LIKE ?')
-            params.append(f'%{tag_filter}%')
-        
-        query += ' AND '.join(conditions)
-    
-    query += ' ORDER BY created_at DESC'
-    
-    cursor.execute(query, params)
-    posts = cursor.fetchall()
-    conn.close()
-    return posts
+# Message retention: messages older than the cutoff leave the database for gzipped JSONL archives
+MESSAGE_RETENTION_DAYS = int(os.environ.get('PORTFOLIO_MESSAGE_RETENTION_DAYS', 180))
+MESSAGE_ARCHIVE_DIR = Path(os.environ.get('PORTFOLIO_MESSAGE_ARCHIVE_DIR', 'archives'))
+RETENTION_CHECK_SECONDS = 3600
+
+@st.cache_resource
+def get_retention_state():
+    return {'checked_at': None, 'last_run': None}
+
+def apply_message_retention():
+    """Archive messages past the retention period at most once per RETENTION_CHECK_SECONDS per server process"""
+    state = get_retention_state()
+    if state['checked_at'] is not None and time.monotonic() - state['checked_at'] < RETENTION_CHECK_SECONDS:
+        return state['last_run']
+    state['checked_at'] = time.monotonic()
+    moved, path = get_repos().messages.archive_older_than(MESSAGE_RETENTION_DAYS, MESSAGE_ARCHIVE_DIR)
+    if moved:
+        state['last_run'] = (moved, path)
+    return state['last_run']
+
+def highlight_snippet(snippet):
+    """Escape an FTS snippet and turn its match markers into <mark> tags"""
+    return (html.escape(snippet)
+            .replace(SNIPPET_START, '<mark>')
+            .replace(SNIPPET_END, '</mark>'))
+
+CONTACT_SPILL_PATH = os.environ.get('PORTFOLIO_CONTACT_SPILL', 'contact_spill.jsonl')
+
+# Contact submissions are written in batches by a background thread
+@st.cache_resource
+def get_contact_writer():
+    init_database()
+    return get_repos().messages.writer(CONTACT_SPILL_PATH).start()
 
 def add_contact_message(name, email, message):
-    conn = sqlite3.connect('portfolio.db')
-    cursor = conn.cursor()
-    cursor.execute('INSERT INTO contact_messages (name, email, message) VALUES (?, ?, ?)',
-                  (name, email, message))
-    conn.commit()
-    conn.close()
+    """Queue a message for the background writer; returns False when the queue is full"""
+    created_at = datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+    return get_contact_writer().submit([name, email, message, created_at, uuid.uuid4().hex])
+
+# Contact form abuse protection: per-client token bucket plus a duplicate-content window
+CONTACT_BURST = 3
+CONTACT_PER_HOUR = 10
+CONTACT_DEDUP_SECONDS = 3600
+
+@st.cache_resource
+def get_contact_guards():
+    return (TokenBucketLimiter(rate=CONTACT_PER_HOUR / 3600, burst=CONTACT_BURST),
+            DedupWindow(ttl=CONTACT_DEDUP_SECONDS))
+
+# Reverse proxies in front of the app that append to X-Forwarded-For. The header is ignored at 0,
+# the default: anything a client sends there itself would otherwise buy it a fresh bucket.
+TRUSTED_PROXY_HOPS = int(os.environ.get('PORTFOLIO_TRUSTED_PROXY_HOPS', 0))
+
+# Submitters without an address share this bucket; a session id would be renewed by every new connection
+UNKNOWN_CLIENT = 'unknown-client'
+
+@st.cache_resource
+def warn_unidentified_clients():
+    # Cached, so the warning is logged once per process
+    logging.getLogger(__name__).warning(
+        'Contact form submitters have no client address (loopback peers, e.g. a reverse proxy on the same '
+        'host); they share one rate-limit bucket. Set PORTFOLIO_TRUSTED_PROXY_HOPS to the number of proxies '
+        'that append to X-Forwarded-For to limit each client separately.')
+
+def client_key():
+    """Identify the submitter: the address the trusted proxy saw, the socket IP, else one shared key"""
+    if TRUSTED_PROXY_HOPS:
+        hops = [hop.strip() for hop in st.context.headers.get('X-Forwarded-For', '').split(',') if hop.strip()]
+        # Only the right-most hops were added by our proxies; entries left of them are client-supplied
+        if len(hops) >= TRUSTED_PROXY_HOPS:
+            return hops[-TRUSTED_PROXY_HOPS]
+    if st.context.ip_address:
+        return st.context.ip_address
+    warn_unidentified_clients()
+    return UNKNOWN_CLIENT
+
+def submit_contact_message(name, email, message):
+    """Screen a submission and queue it; returns 'sent', 'duplicate', 'rate_limited' or 'busy'.
+
+    Rejected submissions never reach the writer or SQLite.
+    """
+    limiter, dedup = get_contact_guards()
+    digest = hashlib.sha256(f'{email.strip().lower()}\0{message.strip()}'.encode()).hexdigest()
+    if dedup.is_duplicate(digest):
+        return 'duplicate'
+    if not limiter.allow(client_key()):
+        return 'rate_limited'
+    if not add_contact_message(name, email, message):
+        return 'busy'
+    dedup.remember(digest)
+    return 'sent'
 
 # File handling functions
-def get_base64_download_link(file_path, filename):
-    """Generate a download link for files"""
-    if os.path.exists(file_path):
-        with open(file_path, "rb") as f:
-            data = f.read()
-        b64 = base64.b64encode(data).decode()
-        href = f'<a href="data:application/octet-stream;base64,{b64}" download="{filename}" class="download-btn">📄 Download CV</a>'
-        return href
-    else:
-        return '<p style="color: red;">CV file not found. Please contact admin.</p>'
+@st.cache_resource(max_entries=8)
+def read_static_file(file_path, mtime_ns, size):
+    """Read a file once per (path, mtime, size); later reruns reuse the same buffer"""
+    with open(file_path, "rb") as f:
+        return f.read()
+
+def show_download_button(file_path, filename, label, mime="application/octet-stream"):
+    """Offer a file for download without inlining it into the page.
+
+    Streamlit registers the bytes with its media file manager and only sends
+    the browser a URL; the file itself is fetched when the button is clicked.
+    """
+    try:
+        stat = os.stat(file_path)
+    except FileNotFoundError:
+        st.markdown('<p style="color: red;">CV file not found. Please contact admin.</p>', unsafe_allow_html=True)
+        return
+    data = read_static_file(file_path, stat.st_mtime_ns, stat.st_size)
+    st.download_button(label, data=data, file_name=filename, mime=mime, on_click="ignore")
+
+# Card images: originals are stored once by content hash, cards only reference resized variants
+CARD_IMAGE_SIZES = "(max-width: 700px) 100vw, 640px"
+
+@st.cache_resource
+def get_thumbnails():
+    return ThumbnailPool()
+
+def save_uploaded_image(uploaded):
+    """Store an uploaded image and build its variants; returns the path to save, or None on error"""
+    if uploaded is None:
+        return None
+    try:
+        image_path = store_original(uploaded.getvalue())
+        get_thumbnails().build(image_path)
+    except ImageError as e:
+        st.error(str(e))
+        return None
+    return image_path
+
+def card_image(image_path, alt, eager=False, base=None):
+    """<picture> markup letting the browser pick the smallest WebP/JPEG variant wide enough for the card.
+
+    `base` is the URL prefix that static/ is served under; the live app's by default.
+    """
+    if not image_path:
+        return ""
+    if base is None:
+        if not st.get_option("server.enableStaticServing"):
+            return ""
+        base = "app/"
+    ready = get_thumbnails().variants(image_path)
+    if ready is None:
+        return ""
+    (width, height), widths = ready
+    srcset = {fmt: ", ".join(f"{base}{variant_path(image_path, w, fmt).as_posix()} {w}w" for w in widths)
+              for fmt in ("webp", "jpg")}
+    # Only the first card is above the fold; the rest load as they scroll into view
+    loading = "eager" if eager else "lazy"
+    return (f'<picture><source type="image/webp" srcset="{srcset["webp"]}" sizes="{CARD_IMAGE_SIZES}">'
+            f'<img class="card-image" src="{base}{variant_path(image_path, widths[0], "jpg").as_posix()}" '
+            f'srcset="{srcset["jpg"]}" sizes="{CARD_IMAGE_SIZES}" width="{width}" height="{height}" '
+            f'loading="{loading}" decoding="async" alt="{html.escape(alt)}"></picture>')
+
+def image_files(image_path):
+    """Variant files a card image references, once they are all built"""
+    ready = get_thumbnails().variants(image_path) if image_path else None
+    if ready is None:
+        return []
+    return [variant_path(image_path, w, fmt).as_posix() for w in ready[1] for fmt in ("webp", "jpg")]
+
+# Card markup: each card is one HTML fragment and every database text field is escaped
+def link_button(url, label, background):
+    return (f'<a href="{html.escape(url)}" target="_blank" rel="noopener" style="text-decoration: none; '
+            f'background: {background}; color: white; padding: 0.5rem 1rem; border-radius: 8px; '
+            f'display: inline-block; margin-right: 0.5rem;">{label}</a>')
+
+def project_card_html(project, eager=False, base=None):
+    links = ""
+    if project['github_link']:
+        links += link_button(project['github_link'], "🔗 GitHub", "#24292e")
+    if project['demo_link']:
+        links += link_button(project['demo_link'], "🚀 Demo", "#667eea")
+    return (
+        f'<div class="project-card">'
+        f'{card_image(project["image_path"], project["title"], eager, base)}'
+        f'<h3 style="color: #2d3748; margin-bottom: 1rem;">{html.escape(project["title"])}</h3>'
+        f'<p style="color: #4a5568; line-height: 1.6; margin-bottom: 1rem;">{html.escape(project["description"])}</p>'
+        f'<div style="margin-bottom: 1rem;"><strong>Technologies:</strong> {html.escape(project["technologies"])}</div>'
+        f'<div>{links}</div>'
+        f'</div>'
+    )
+
+def tags_html(tags):
+    spans = "".join(f'<span style="background: #e2e8f0; color: #2d3748; padding: 0.25rem 0.5rem; border-radius: 12px; '
+                    f'font-size: 0.8rem; margin-right: 0.5rem;">#{html.escape(tag)}</span>' for tag in parse_tags(tags))
+    return f'<div style="margin-bottom: 1rem;">{spans}</div>' if spans else ""
+
+def post_excerpt_html(post):
+    if post['snippet']:
+        # Search hit: show the matching passage instead of the opening lines
+        return f'<p>{highlight_snippet(post["snippet"])}</p>'
+    if post['excerpt_html'] is not None and post['excerpt_updated_at'] == post['updated_at']:
+        return post['excerpt_html']
+    # Written or edited outside the app and not refreshed yet; show plain text rather than render here
+    return f'<p>{html.escape(post["content"][:EXCERPT_LENGTH])}…</p>'
+
+def post_meta_html(post):
+    reading_time = f" · ⏱️ {post['reading_time']} min read" if post['reading_time'] else ""
+    return (f'<p style="color: #718096; font-size: 0.9rem; margin-bottom: 1rem;">'
+            f'📅 {html.escape(str(post["created_at"]))}{reading_time}</p>')
+
+def cards_markdown(cards):
+    """Join card fragments into a single markdown element.
+
+    A blank line would end the raw HTML block and hand the rest to the markdown
+    parser, so newlines that open a blank line (inside <pre> code, typically)
+    become character references, which render the same.
+    """
+    return re.sub(r'\n(?=[ \t]*\n)', '&#10;', "".join(cards))
+
+def related_html(related, href_of):
+    """One line of links to related posts; `related` holds (post_id, title) pairs"""
+    if not related:
+        return ""
+    links = " · ".join(f'<a href="{html.escape(href_of(post_id, title))}">{html.escape(title)}</a>'
+                       for post_id, title in related)
+    return f'<p class="related-posts">Related: {links}</p>'
+
+def blog_card_html(post, eager=False, base=None, href=None, related=""):
+    title = html.escape(post['title'])
+    if href:
+        title = f'<a href="{html.escape(href)}" style="color: inherit; text-decoration: none;">{title}</a>'
+    return (
+        f'<div class="blog-card">'
+        f'{card_image(post["featured_image"], post["title"], eager, base)}'
+        f'<h3 style="color: #2d3748; margin-bottom: 0.5rem;">{title}</h3>'
+        f'{post_meta_html(post)}'
+        f'<div style="color: #4a5568; line-height: 1.6; margin-bottom: 1rem;">{post_excerpt_html(post)}</div>'
+        f'{tags_html(post["tags"])}'
+        f'{related}'
+        f'</div>'
+    )
+
+# Incremental "load more" lists
+def load_pages(key, fetch, cursor_of, filters=None):
+    """Fetch the pages this session has asked for, following keyset cursors.
+
+    Returns (rows, has_more). Changing `filters` starts again from page one.
+    """
+    state = st.session_state.get(key)
+    if state is None or state['filters'] != filters:
+        state = st.session_state[key] = {'filters': filters, 'pages': 1}
+    
+    rows = []
+    after = None
+    for _ in range(state['pages']):
+        page = fetch(limit=PAGE_SIZE + 1, after=after)
+        rows.extend(page[:PAGE_SIZE])
+        if len(page) <= PAGE_SIZE:
+            return rows, False
+        after = cursor_of(page[PAGE_SIZE - 1])
+    return rows, True
+
+def snapshot_or_sql(read, fallback):
+    """A load_pages() fetch that reads the shared snapshot and asks SQL only for rows beyond it"""
+    def fetch(limit, after):
+        rows = read(limit=limit, after=after)
+        return fallback(limit=limit, after=after) if rows is None else rows
+    return fetch
+
+def _load_next_page(key):
+    st.session_state[key]['pages'] += 1
+
+def show_load_more(key):
+    st.button("Load more", key=f"{key}_more", on_click=_load_next_page, args=(key,), width="stretch")
+
+# Static export of the public pages, for serving anonymous traffic from a file server or CDN
+SITE_DIR = os.environ.get('PORTFOLIO_SITE_DIR', 'site')
+STATIC_PAGE_SIZE = 50
+STATIC_SITE_VERSION = 1  # Bump when the exported markup changes, to rebuild every page
+
+def post_slug(post):
+    slug = re.sub(r'[^a-z0-9]+', '-', post['title'].lower()).strip('-')[:60]
+    return f"blog/{post['id']}-{slug or 'post'}.html"
+
+def listing_path(section, number):
+    return f"{section}/index.html" if number == 1 else f"{section}/page/{number}.html"
+
+def static_page(title, body, base, css_path):
+    nav = " · ".join(f'<a href="{base}{path}">{label}</a>'
+                     for path, label in (("", "🏠 Home"), ("projects/", "🚀 Projects"), ("blog/", "📝 Blog")))
+    return (f'<!DOCTYPE html>\n<html lang="en"><head><meta charset="utf-8">'
+            f'<meta name="viewport" content="width=device-width, initial-scale=1">'
+            f'<title>{html.escape(title)} · AI Engineer Portfolio</title>'
+            f'<link rel="stylesheet" href="{base}{css_path}"></head>'
+            f'<body><main style="max-width: 1100px; margin: 0 auto; padding: 1rem 1.5rem;">'
+            f'<nav style="margin-bottom: 1.5rem;">{nav}</nav>{body}</main></body></html>\n')
+
+def pager_html(base, section, number, count):
+    def href(n):
+        return f"{base}{section}/" if n == 1 else f"{base}{section}/page/{n}.html"
+    links = []
+    if number > 1:
+        links.append(f'<a href="{href(number - 1)}">← Newer</a>')
+    if number < count:
+        links.append(f'<a href="{href(number + 1)}">Older →</a>')
+    return f'<p style="display: flex; justify-content: space-between;">{"".join(links)}</p>' if links else ""
+
+def static_home_html(base, cv_path):
+    import markdown
+    from textwrap import dedent
+    stats = "".join(f'<div class="metric-card"><h3 style="margin: 0; font-size: 2rem;">{value}</h3>'
+                    f'<p style="margin: 0.5rem 0 0 0;">{label}</p></div>' for label, value in HOME_STATS)
+    cv = ""
+    if cv_path:
+        cv = f'<h3>📄 Download My CV</h3><p><a href="{base}{cv_path}" download="AI_Engineer_CV.pdf">📄 Download CV</a></p>'
+    return (f'{HOME_HERO}<div style="display: flex; gap: 2rem; flex-wrap: wrap;">'
+            f'<div style="flex: 2; min-width: 300px;">'
+            f'<h3>👋 Welcome to My Portfolio</h3>{markdown.markdown(dedent(HOME_ABOUT))}'
+            f'<h3>🛠️ Technical Skills</h3>{skills_html()}'
+            f'<h3>📈 Professional Experience</h3>{markdown.markdown(dedent(HOME_EXPERIENCE))}</div>'
+            f'<div style="flex: 1; min-width: 240px;"><h3>📊 Quick Stats</h3>{stats}{cv}'
+            f'<h3>🏆 Achievements</h3>{markdown.markdown(dedent(HOME_ACHIEVEMENTS))}</div></div>')
+
+def export_static_site(out_dir=SITE_DIR, base="/"):
+    """Pre-render Home, Projects, Blog and one page per post as plain HTML.
+
+    Each page is keyed by a hash of what it shows: for posts the small columns
+    including created_at/updated_at, for projects (which have no updated_at) the
+    whole row. Only pages whose key changed are queried in full and rendered.
+    """
+    import markdown
+    repos = get_repos()
+    theme = build_theme_bundle(THEME_CSS, os.stat(THEME_CSS).st_mtime_ns)
+    css_path = f"static/{Path(theme['url']).name}"
+    site = SiteWriter(out_dir, source_hash(STATIC_SITE_VERSION, base, css_path))
+    site.copy(css_path, css_path)
+
+    def page(title, body):
+        return static_page(title, body, base, css_path)
+
+    cv_path = "static/cv.pdf" if os.path.exists("static/cv.pdf") else None
+    if cv_path:
+        site.copy(cv_path, cv_path)
+    source = source_hash(HOME_HERO, HOME_ABOUT, SKILLS, HOME_EXPERIENCE, HOME_STATS, HOME_ACHIEVEMENTS, cv_path)
+    if not site.fresh("index.html", source):
+        site.write("index.html", source, page("Home", static_home_html(base, cv_path)))
+
+    projects = repos.projects.all()
+    pages = [projects[i:i + STATIC_PAGE_SIZE] for i in range(0, len(projects), STATIC_PAGE_SIZE)] or [[]]
+    for number, rows in enumerate(pages, 1):
+        path = listing_path("projects", number)
+        assets = [f for row in rows for f in image_files(row['image_path'])]
+        source = source_hash(number, len(pages), [tuple(row) for row in rows], assets)
+        if site.fresh(path, source):
+            continue
+        cards = "".join(project_card_html(row, eager=i == 0, base=base) for i, row in enumerate(rows))
+        body = f'<h1>🚀 AI Projects Portfolio</h1>{cards or "<p>No projects available yet.</p>"}'
+        site.write(path, source, page("Projects", body + pager_html(base, "projects", number, len(pages))), assets)
+
+    # Only the small columns are read up front; content and excerpts are fetched for stale pages alone
+    posts = repos.posts.summaries()
+    images = {post['id']: image_files(post['featured_image']) for post in posts}
+    pages = [posts[i:i + STATIC_PAGE_SIZE] for i in range(0, len(posts), STATIC_PAGE_SIZE)] or [[]]
+    for number, rows in enumerate(pages, 1):
+        path = listing_path("blog", number)
+        assets = [f for row in rows for f in images[row['id']]]
+        source = source_hash(number, len(pages), [tuple(row) for row in rows], assets)
+        if site.fresh(path, source):
+            continue
+        ids = [row['id'] for row in rows]
+        full = repos.posts.by_ids(ids)
+        cards = "".join(blog_card_html(full[post_id], eager=i == 0, base=base, href=base + post_slug(full[post_id]))
+                        for i, post_id in enumerate(ids))
+        body = f'<h1>📝 AI Engineering Blog</h1>{cards or "<p>No blog posts yet.</p>"}'
+        site.write(path, source, page("Blog", body + pager_html(base, "blog", number, len(pages))), assets)
+
+    # Related links change when other posts do, so they are part of each page's key
+    related = get_related()
+    related.sync()
+    related_href = lambda post_id, title: base + post_slug({'id': post_id, 'title': title})
+    for light in posts:
+        path = post_slug(light)
+        neighbours = related.related(light['id'])[:RELATED_POSTS]
+        source = source_hash(tuple(light), images[light['id']], neighbours)
+        if site.fresh(path, source):
+            continue
+        post = repos.posts.get(light['id'])
+        body = (f'<article class="blog-card">'
+                f'{card_image(post["featured_image"], post["title"], eager=True, base=base)}'
+                f'<h1>{html.escape(post["title"])}</h1>{post_meta_html(post)}'
+                f'{markdown.markdown(post["content"], extensions=["fenced_code", "tables"])}'
+                f'{tags_html(post["tags"])}{related_html(neighbours, related_href)}</article>'
+                f'<p><a href="{base}blog/">← All posts</a></p>')
+        site.write(path, source, page(post["title"], body), images[light['id']])
+
+    return site.finish()
+
+# Home page content, shared by the live page and the static export
+HOME_HERO = """
+<div class="hero-container">
+    <h1 class="hero-title">AI Engineer Portfolio</h1>
+    <p class="hero-subtitle">Building the Future with Artificial Intelligence</p>
+    <p style="font-size: 1.2rem; margin-bottom: 2rem;">Senior AI Engineer | Machine Learning Specialist | Deep Learning Expert</p>
+</div>
+"""
+
+HOME_ABOUT = """
+I am a passionate AI Engineer with extensive experience in developing cutting-edge machine learning solutions 
+and deploying scalable AI systems. My expertise spans across various domains including Natural Language Processing, 
+Computer Vision, and Large Language Models.
+
+**Current Focus Areas:**
+- Large Language Model Development and Fine-tuning
+- Multimodal AI Systems
+- MLOps and AI Infrastructure
+- Responsible AI and Ethics
+"""
+
+SKILLS = [
+    "Python", "TensorFlow", "PyTorch", "Hugging Face", "LangChain",
+    "AWS", "GCP", "Docker", "Kubernetes", "MLflow", "Weights & Biases",
+    "Transformer Models", "BERT", "GPT", "Computer Vision", "NLP",
+    "Deep Learning", "Reinforcement Learning", "MLOps", "Data Engineering"
+]
+
+HOME_EXPERIENCE = """
+**Senior AI Engineer** | *Leading Tech Company* | 2022 - Present
+- Led development of large-scale language models serving millions of users
+- Implemented MLOps pipelines reducing model deployment time by 70%
+- Collaborated with cross-functional teams to deliver AI-powered products
+
+**Machine Learning Engineer** | *AI Startup* | 2020 - 2022
+- Built and deployed computer vision models for autonomous systems
+- Optimized model performance achieving 95% accuracy on production data
+- Mentored junior engineers and established ML best practices
+"""
+
+HOME_STATS = [
+    ("Years of Experience", "5+"),
+    ("AI Projects Completed", "50+"),
+    ("Models Deployed", "25+"),
+    ("Publications", "12"),
+]
+
+HOME_ACHIEVEMENTS = """
+- **Best AI Innovation Award** 2023
+- **Top 1% Kaggle Competitor**
+- **Published Research** in NeurIPS
+- **Patent Holder** - AI System Optimization
+"""
+
+def skills_html():
+    tags = "".join(f'<span class="skill-tag">{html.escape(skill)}</span>' for skill in SKILLS)
+    return f'<div style="margin-top: 1rem;">{tags}</div>'
 
 # Page functions
+@perf.timed("page")
 def show_home_page():
-    st.markdown("""
-    <div class="hero-container">
-        <h1 class="hero-title">AI Engineer Portfolio</h1>
-        <p class="hero-subtitle">Building the Future with Artificial Intelligence</p>
-        <p style="font-size: 1.2rem; margin-bottom: 2rem;">Senior AI Engineer | Machine Learning Specialist | Deep Learning Expert</p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(HOME_HERO, unsafe_allow_html=True)
     
     col1, col2 = st.columns([2, 1])
     
     with col1:
         st.markdown("### 👋 Welcome to My Portfolio")
-        st.markdown("""
-        I am a passionate AI Engineer with extensive experience in developing cutting-edge machine learning solutions 
-        and deploying scalable AI systems. My expertise spans across various domains including Natural Language Processing, 
-        Computer Vision, and Large Language Models.
-        
-        **Current Focus Areas:**
-        - Large Language Model Development and Fine-tuning
-        - Multimodal AI Systems
-        - MLOps and AI Infrastructure
-        - Responsible AI and Ethics
-        """)
+        st.markdown(HOME_ABOUT)
         
         st.markdown("### 🛠️ Technical Skills")
-        skills = [
-            "Python", "TensorFlow", "PyTorch", "Hugging Face", "LangChain",
-            "AWS", "GCP", "Docker", "Kubernetes", "MLflow", "Weights & Biases",
-            "Transformer Models", "BERT", "GPT", "Computer Vision", "NLP",
-            "Deep Learning", "Reinforcement Learning", "MLOps", "Data Engineering"
-        ]
-        
-        skills_html = "".join([f'<span class="skill-tag">{skill}</span>' for skill in skills])
-        st.markdown(f'<div style="margin-top: 1rem;">{skills_html}</div>', unsafe_allow_html=True)
+        st.markdown(skills_html(), unsafe_allow_html=True)
         
         st.markdown("### 📈 Professional Experience")
-        st.markdown("""
-        **Senior AI Engineer** | *Leading Tech Company* | 2022 - Present
-        - Led development of large-scale language models serving millions of users
-        - Implemented MLOps pipelines reducing model deployment time by 70%
-        - Collaborated with cross-functional teams to deliver AI-powered products
-        
-        **Machine Learning Engineer** | *AI Startup* | 2020 - 2022
-        - Built and deployed computer vision models for autonomous systems
-        - Optimized model performance achieving 95% accuracy on production data
-        - Mentored junior engineers and established ML best practices
-        """)
+        st.markdown(HOME_EXPERIENCE)
     
     with col2:
         st.markdown("### 📊 Quick Stats")
-        st.metric("Years of Experience", "5+")
-        st.metric("AI Projects Completed", "50+")
-        st.metric("Models Deployed", "25+")
-        st.metric("Publications", "12")
+        for label, value in HOME_STATS:
+            st.metric(label, value)
         
         st.markdown("### 📄 Download My CV")
-        cv_link = get_base64_download_link("static/cv.pdf", "AI_Engineer_CV.pdf")
-        st.markdown(cv_link, unsafe_allow_html=True)
+        show_download_button("static/cv.pdf", "AI_Engineer_CV.pdf", "📄 Download CV", mime="application/pdf")
         
         st.markdown("### 🏆 Achievements")
-        st.markdown("""
-        - **Best AI Innovation Award** 2023
-        - **Top 1% Kaggle Competitor**
-        - **Published Research** in NeurIPS
-        - **Patent Holder** - AI System Optimization
-        """)
+        st.markdown(HOME_ACHIEVEMENTS)
 
+@perf.timed("page")
 def show_projects_page():
     st.markdown("# 🚀 AI Projects Portfolio")
     st.markdown("Explore my collection of AI and machine learning projects that demonstrate expertise across various domains.")
     
-    projects = get_projects()
+    repo = get_repos().projects
+    snapshot = get_snapshots().current()
+    projects, has_more = load_pages('projects_pages', snapshot_or_sql(snapshot.projects_page, repo.page), repo.cursor)
     
     if not projects:
         st.info("No projects available yet. Please check back later or contact the admin to add projects.")
         return
     
-    for project in projects:
-        project_id, title, description, technologies, image_path, github_link, demo_link, created_at = project
-        
-        st.markdown(f"""
-        <div class="project-card">
-            <h3 style="color: #2d3748; margin-bottom: 1rem;">{title}</h3>
-            <p style="color: #4a5568; line-height: 1.6; margin-bottom: 1rem;">{description}</p>
-            <div style="margin-bottom: 1rem;">
-                <strong>Technologies:</strong> {technologies}
-            </div>
-        """, unsafe_allow_html=True)
-        
-        col1, col2, col3 = st.columns([1, 1, 2])
-        
-        if github_link:
-            with col1:
-                st.markdown(f'<a href="{github_link}" target="_blank" style="text-decoration: none; background: #24292e; color: white; padding: 0.5rem 1rem; border-radius: 8px; display: inline-block;">🔗 GitHub</a>', unsafe_allow_html=True)
-        
-        if demo_link:
-            with col2:
-                st.markdown(f'<a href="{demo_link}" target="_blank" style="text-decoration: none; background: #667eea; color: white; padding: 0.5rem 1rem; border-radius: 8px; display: inline-block;">🚀 Demo</a>', unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown(cards_markdown(project_card_html(project, eager=index == 0) for index, project in enumerate(projects)),
+                unsafe_allow_html=True)
+    
+    if has_more:
+        show_load_more('projects_pages')
+
+def post_href(post_id, title=None):
+    return f"?post={post_id}"
 
+def _close_post():
+    st.query_params.clear()
+
+def show_post(repo, post_id):
+    post = repo.get(post_id)
+    if post is None:
+        st.warning("That post no longer exists.")
+    else:
+        st.markdown(f'{card_image(post["featured_image"], post["title"], eager=True)}'
+                    f'<h1>{html.escape(post["title"])}</h1>{post_meta_html(post)}', unsafe_allow_html=True)
+        st.markdown(post['content'])
+        st.markdown(tags_html(post['tags']) + related_html(get_related().related(post_id)[:RELATED_POSTS], post_href),
+                    unsafe_allow_html=True)
+    st.button("← All posts", on_click=_close_post)
+
+@perf.timed("page")
 def show_blog_page():
+    repo = get_repos().posts
+    post_id = st.query_params.get("post", "")
+    if post_id.isdigit():
+        show_post(repo, int(post_id))
+        return
+    
     st.markdown("# 📝 AI Engineering Blog")
     st.markdown("Insights, tutorials, and thoughts on artificial intelligence and machine learning.")
     
+    snapshot = get_snapshots().current()
     col1, col2 = st.columns([2, 1])
     
     with col1:
         search_term = st.text_input("🔍 Search blog posts", placeholder="Enter keywords...")
     
     with col2:
-        tag_filter = st.selectbox("🏷️ Filter by tag", ["All", "AI", "ML", "Deep Learning", "NLP", "Computer Vision", "MLOps"])
-        if tag_filter == "All":
-            tag_filter = None
-    
-    posts = get_blog_posts(search_term if search_term else None, tag_filter)
+        tag_counts = {tag: count for tag, count in snapshot.tag_counts}
+        tag_filter = st.selectbox("🏷️ Filter by tag", [None] + list(tag_counts),
+                                  format_func=lambda tag: "All" if tag is None else f"{tag} ({tag_counts[tag]})")
+    
+    search_term = search_term or None
+    if search_term:
+        # Ranked full-text search stays in FTS5
+        fetch = lambda limit, after: repo.page(search_term, tag_filter, limit=limit, after=after)
+    else:
+        fetch = snapshot_or_sql(lambda limit, after: snapshot.posts_page(tag_filter, limit=limit, after=after),
+                                lambda limit, after: repo.page(None, tag_filter, limit=limit, after=after))
+    posts, has_more = load_pages(
+        'blog_pages',
+        fetch,
+        repo.cursor,
+        filters=(search_term, tag_filter),
+    )
     
     if not posts:
         st.info("No blog posts found. Try adjusting your search criteria or check back later.")
         return
     
-    for post in posts:
-        post_id, title, content, tags, featured_image, created_at, updated_at = post
-        
-        # Convert markdown content to HTML
-        html_content = markdown.markdown(content[:300] + "..." if len(content) > 300 else content)
-        
-        st.markdown(f"""
-        <div class="blog-card">
-            <h3 style="color: #2d3748; margin-bottom: 0.5rem;">{title}</h3>
-            <p style="color: #718096; font-size: 0.9rem; margin-bottom: 1rem;">📅 {created_at}</p>
-            <div style="color: #4a5568; line-height: 1.6; margin-bottom: 1rem;">
-                {html_content}
-            </div>
-        """, unsafe_allow_html=True)
-        
-        if tags:
-            tags_list = [tag.strip() for tag in tags.split(',')]
-            tags_html = "".join([f'<span style="background: #e2e8f0; color: #2d3748; padding: 0.25rem 0.5rem; border-radius: 12px; font-size: 0.8rem; margin-right: 0.5rem;">#{tag}</span>' for tag in tags_list])
-            st.markdown(f'<div style="margin-bottom: 1rem;">{tags_html}</div>', unsafe_allow_html=True)
-        
-        st.markdown("</div>", unsafe_allow_html=True)
+    related = get_related()
+    st.markdown(cards_markdown(
+        blog_card_html(post, eager=index == 0, href=post_href(post['id']),
+                       related=related_html(related.related(post['id'])[:RELATED_POSTS], post_href))
+        for index, post in enumerate(posts)), unsafe_allow_html=True)
+    
+    if has_more:
+        show_load_more('blog_pages')
 
+@perf.timed("page")
 def show_contact_page():
     st.markdown("# 📞 Get In Touch")
     st.markdown("Let's discuss AI opportunities, collaborations, or any questions you might have.")
@@ -1024,8 +1087,13 @@ def show_contact_page():
             
             if submitted:
                 if name and email and message:
-                    add_contact_message(name, email, message)
-                    st.success("Thank you for your message! I'll get back to you soon.")
+                    status = submit_contact_message(name, email, message)
+                    if status in ('sent', 'duplicate'):
+                        st.success("Thank you for your message! I'll get back to you soon.")
+                    elif status == 'rate_limited':
+                        st.error("You've sent several messages in a short time. Please try again later.")
+                    else:
+                        st.error("We're receiving a lot of messages right now. Please try again in a minute.")
                 else:
                     st.error("Please fill in all fields.")
         
@@ -1055,6 +1123,7 @@ def show_contact_page():
         st.markdown("### 🌍 Location")
         st.markdown("Available for remote work worldwide and on-site in major tech hubs.")
 
+@perf.timed("page")
 def show_admin_login():
     st.markdown("# 🔐 Admin Login")
     
@@ -1064,13 +1133,14 @@ def show_admin_login():
         login_btn = st.form_submit_button("Login")
         
         if login_btn:
-            if authenticate_admin(username, password):
+            if get_repos().users.authenticate(username, password):
                 st.session_state.admin_logged_in = True
                 st.success("Login successful!")
                 st.rerun()
             else:
                 st.error("Invalid credentials")
 
+@perf.timed("page")
 def show_admin_dashboard():
     st.markdown("# 🛠️ Admin Dashboard")
     
@@ -1078,35 +1148,84 @@ def show_admin_dashboard():
         st.session_state.admin_logged_in = False
         st.rerun()
     
-    tab1, tab2, tab3, tab4 = st.tabs(["📊 Overview", "🚀 Projects", "📝 Blog", "📨 Messages"])
+    repos = get_repos()
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(["📊 Overview", "🚀 Projects", "📝 Blog", "📨 Messages", "⏱️ Performance", "🐢 Slow Queries", "📦 Import / Export"])
     
     with tab1:
         st.markdown("### Portfolio Overview")
         col1, col2, col3, col4 = st.columns(4)
         
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        
-        cursor.execute('SELECT COUNT(*) FROM projects')
-        project_count = cursor.fetchone()[0]
-        
-        cursor.execute('SELECT COUNT(*) FROM blog_posts')
-        blog_count = cursor.fetchone()[0]
+        db = get_db()
+        stats = repos.content_stats()
         
-        cursor.execute('SELECT COUNT(*) FROM contact_messages')
-        message_count = cursor.fetchone()[0]
+        with col1:
+            st.metric("Total Projects", stats['projects'])
+        with col2:
+            st.metric("Blog Posts", stats['blog_posts'], f"{stats['posts_7d']} this week")
+        with col3:
+            st.metric("Contact Messages", stats['contact_messages'], f"{stats['messages_24h']} in 24h")
+        with col4:
+            st.metric("Admin Users", stats['admin_users'])
+        if stats['last_message_at']:
+            st.caption(f"Last message received {stats['last_message_at']} UTC")
         
-        conn.close()
+        st.markdown("### Database Connections")
+        pool_stats = db.stats()
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Open Connections", pool_stats['open'])
+        with col2:
+            st.metric("Opened", pool_stats['created'])
+        with col3:
+            st.metric("Reused", pool_stats['reused'])
+        with col4:
+            st.metric("Reclaimed", pool_stats['reclaimed'])
+        st.caption(f"{pool_stats['queries']} queries, {pool_stats['transactions']} transactions, "
+                   f"{pool_stats['rollbacks']} rollbacks since server start")
         
+        st.markdown("### Query Cache")
+        cache_stats = db.cache.stats()
+        col1, col2, col3, col4 = st.columns(4)
         with col1:
-            st.metric("Total Projects", project_count)
+            st.metric("Hit Rate", f"{cache_stats['hit_rate']:.0%}")
         with col2:
-            st.metric("Blog Posts", blog_count)
+            st.metric("Hits / Misses", f"{cache_stats['hits']} / {cache_stats['misses']}")
         with col3:
-            st.metric("Contact Messages", message_count)
+            st.metric("Cached Queries", cache_stats['entries'])
         with col4:
-            st.metric("Admin Users", 1)
-    
+            st.metric("Invalidations", cache_stats['invalidations'])
+        st.caption(f"{cache_stats['evictions']} LRU evictions, data version {cache_stats['version']}")
+        
+        limiter, dedup = get_contact_guards()
+        writer_stats = get_contact_writer().stats()
+        st.caption(f"Contact writer: {writer_stats['written']:,} messages written in {writer_stats['batches']:,} batches, "
+                   f"{writer_stats['queued']} queued, {writer_stats['retrying']} awaiting retry, "
+                   f"{writer_stats['rejected']} rejected (queue full), {writer_stats['replayed']} replayed at start, "
+                   f"{writer_stats['errors']} write errors")
+        limiter_stats, dedup_stats = limiter.stats(), dedup.stats()
+        st.caption(f"Contact form: {limiter_stats['allowed']} allowed, {limiter_stats['limited']} rate limited, "
+                   f"{dedup_stats['duplicates']} duplicates dropped "
+                   f"({limiter_stats['keys']} clients and {dedup_stats['entries']} digests tracked)")
+        
+        theme_stats = theme_payload_stats()
+        st.caption(f"Theme: {theme_stats['rerun_bytes']:,} bytes per rerun "
+                   f"({theme_stats['saved_bytes']:,} bytes saved against inlining {theme_stats['inline_bytes']:,})")
+        thumbnail_stats = get_thumbnails().stats()
+        st.caption(f"Thumbnails: {thumbnail_stats['ready']} images ready, {thumbnail_stats['pending']} building, "
+                   f"{thumbnail_stats['failed']} failed")
+        snapshot_stats = get_snapshots().stats()
+        st.caption(f"Public content snapshot: version {snapshot_stats['version']}, "
+                   f"{snapshot_stats['projects']:,} projects and {snapshot_stats['posts']:,} posts"
+                   f"{'' if snapshot_stats['complete'] else ' (newest only)'}, built in "
+                   f"{snapshot_stats['build_ms']:.0f} ms, {snapshot_stats['age_seconds']:.0f} s ago; "
+                   f"{snapshot_stats['builds']} builds, {snapshot_stats['skipped']} unrelated commits skipped, "
+                   f"{snapshot_stats['failures']} failures")
+        related_stats = get_related().stats()
+        st.caption(f"Related posts: {related_stats['posts']:,} posts indexed, {related_stats['syncs']} syncs "
+                   f"({related_stats['rebuilds']} full rebuilds, {related_stats['added']} added, "
+                   f"{related_stats['removed']} removed, last {related_stats['sync_ms']:.0f} ms), "
+                   f"{related_stats['failures']} failures")
+
     with tab2:
         st.markdown("### Manage Projects")
         
@@ -1118,46 +1237,17 @@ def show_admin_dashboard():
                 technologies = st.text_input("Technologies (comma-separated)")
                 github_link = st.text_input("GitHub Link (optional)")
                 demo_link = st.text_input("Demo Link (optional)")
+                image = st.file_uploader("Image (optional)", type=ACCEPTED_TYPES)
                 
                 if st.form_submit_button("Add Project"):
                     if title and description and technologies:
-                        conn = sqlite3.connect('portfolio.db')
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            INSERT INTO projects (title, description, technologies, github_link, demo_link)
-                            VALUES (?, ?, ?, ?, ?)
-                        ''', (title, description, technologies, github_link, demo_link))
-                        conn.commit()
-                        conn.close()
-                        st.success("Project added successfully!")
-                        st.rerun()
-        
-        # List existing projects
-        projects = get_projects()
-        if projects:
-            st.markdown("### Existing Projects")
-            for project in projects:
-                project_id, title, description, technologies, image_path, github_link, demo_link, created_at = project
-                
-                with st.expander(f"{title}"):
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write(f"**Description:** {description}")
-                        st.write(f"**Technologies:** {technologies}")
-                        if github_link:
-                            st.write(f"**GitHub:** {github_link}")
-                        if demo_link:
-                            st.write(f"**Demo:** {demo_link}")
-                    
-                    with col2:
-                        if st.button(f"Delete", key=f"del_proj_{project_id}"):
-                            conn = sqlite3.connect('portfolio.db')
-                            cursor = conn.cursor()
-                            cursor.execute('DELETE FROM projects WHERE id = ?', (project_id,))
-                            conn.commit()
-                            conn.close()
-                            st.success("Project deleted!")
+                        image_path = save_uploaded_image(image)
+                        if image is None or image_path:
+                            repos.projects.add(title, description, technologies, image_path, github_link, demo_link)
+                            st.success("Project added successfully!")
                             st.rerun()
+        
+        show_admin_grid(repos.projects, "projects")
     
     with tab3:
         st.markdown("### Manage Blog Posts")
@@ -1168,75 +1258,264 @@ def show_admin_dashboard():
                 title = st.text_input("Post Title")
                 content = st.text_area("Content (Markdown supported)", height=200)
                 tags = st.text_input("Tags (comma-separated)")
+                image = st.file_uploader("Featured image (optional)", type=ACCEPTED_TYPES)
                 
                 if st.form_submit_button("Add Blog Post"):
                     if title and content:
-                        conn = sqlite3.connect('portfolio.db')
-                        cursor = conn.cursor()
-                        cursor.execute('''
-                            INSERT INTO blog_posts (title, content, tags)
-                            VALUES (?, ?, ?)
-                        ''', (title, content, tags))
-                        conn.commit()
-                        conn.close()
-                        st.success("Blog post added successfully!")
-                        st.rerun()
-        
-        # List existing blog posts
-        posts = get_blog_posts()
-        if posts:
-            st.markdown("### Existing Blog Posts")
-            for post in posts:
-                post_id, title, content, tags, featured_image, created_at, updated_at = post
-                
-                with st.expander(f"{title}"):
-                    col1, col2 = st.columns([3, 1])
-                    with col1:
-                        st.write(f"**Created:** {created_at}")
-                        st.write(f"**Tags:** {tags}")
-                        st.write(f"**Content Preview:** {content[:200]}...")
-                    
-                    with col2:
-                        if st.button(f"Delete", key=f"del_post_{post_id}"):
-                            conn = sqlite3.connect('portfolio.db')
-                            cursor = conn.cursor()
-                            cursor.execute('DELETE FROM blog_posts WHERE id = ?', (post_id,))
-                            conn.commit()
-                            conn.close()
-                            st.success("Blog post deleted!")
+                        featured_image = save_uploaded_image(image)
+                        if image is None or featured_image:
+                            repos.posts.add(title, content, tags, featured_image)
+                            st.success("Blog post added successfully!")
                             st.rerun()
+        
+        show_admin_grid(repos.posts, "blog posts")
     
     with tab4:
-        st.markdown("### Contact Messages")
+        show_messages_tab()
+    
+    with tab5:
+        show_performance_tab()
+    
+    with tab6:
+        show_slow_query_tab()
+    
+    with tab7:
+        show_bulk_tab()
+
+def _reset_grid_page(key):
+    st.session_state[f"{key}_page"] = 1
+
+def show_admin_grid(repo, label, actions=None, view=None, placeholder="Title, tags, ..."):
+    """Paginated, filterable grid whose selected rows are changed together, with one rerun.
+
+    `actions` are (button label, past tense, function(ids) -> rows changed); each
+    function runs one statement in one transaction. Returns the selected ids.
+    """
+    key = f"{repo.table}_grid"
+    if actions is None:
+        actions = [("Delete", "Deleted", repo.delete)]
+    flash = st.session_state.pop(f"{key}_flash", None)
+    if flash:
+        st.success(flash)
+
+    col1, col2, col3 = st.columns([3, 1, 1])
+    with col1:
+        filter_text = st.text_input(f"Filter {label}", key=f"{key}_filter", placeholder=placeholder,
+                                    on_change=_reset_grid_page, args=(key,)).strip()
+    with col2:
+        page_size = st.selectbox("Rows per page", ADMIN_PAGE_SIZES, key=f"{key}_size",
+                                 on_change=_reset_grid_page, args=(key,))
+
+    total = repo.count(filter_text, view)
+    pages = max(1, -(-total // page_size))
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with col3:
+        page = st.number_input("Page", min_value=1, max_value=pages, key=f"{key}_page")
+
+    rows = repo.grid_page(filter_text, page, page_size, view)
+    if not rows:
+        st.info(f"No {label} found.")
+        return []
+    st.caption(f"{(page - 1) * page_size + 1:,}–{(page - 1) * page_size + len(rows):,} of {total:,} {label}")
+
+    # A selection belongs to this exact page of rows; changing page, filter, view or data starts a fresh one
+    generation = st.session_state.get(f"{key}_generation", 0)
+    grid_key = f"{key}_{generation}_{view}_{page}_{page_size}_{filter_text}"
+    event = st.dataframe([dict(row) for row in rows], width="stretch", hide_index=True,
+                         on_select="rerun", selection_mode="multi-row", key=grid_key)
+    # Selected positions refer to the rows the browser was showing, i.e. the previous run's, which may
+    # differ from this run's if new rows arrived in between
+    shown_key, shown_ids = st.session_state.get(f"{key}_shown", (None, None))
+    ids = [row['id'] for row in rows]
+    visible = shown_ids if shown_key == grid_key else ids
+    selected = [visible[i] for i in event.selection.rows if i < len(visible)]
+    st.session_state[f"{key}_shown"] = (grid_key, ids)
+
+    columns = st.columns(len(actions) + 2)
+    for column, (button, done, apply) in zip(columns, actions):
+        with column:
+            if st.button(f"{button} ({len(selected)})", key=f"{key}_{button}", disabled=not selected,
+                         width="stretch"):
+                changed = apply(selected)
+                st.session_state[f"{key}_generation"] = generation + 1
+                st.session_state[f"{key}_flash"] = f"{done} {changed:,} {label}."
+                st.rerun()
+    return selected
+
+def show_messages_tab():
+    st.markdown("### Contact Messages")
+    # Before anything is counted, so the grid never shows rows that are about to leave
+    last_run = apply_message_retention()
+    repo = get_repos().messages
+    views = list(repo.views)
+    unread = repo.count_unread()
+    view = st.radio("View", views, horizontal=True, key="messages_view",
+                    format_func=lambda v: f"{v} ({unread:,})" if v == "Unread" else v,
+                    on_change=_reset_grid_page, args=("contact_messages_grid",))
+    if view == "Archived":
+        actions = [
+            ("Restore", "Restored", lambda ids: repo.set_archived(ids, archived=False)),
+            ("Delete", "Deleted", repo.delete),
+        ]
+    else:
+        actions = [
+            ("Mark read", "Marked as read", repo.set_read),
+            ("Mark unread", "Marked as unread", lambda ids: repo.set_read(ids, read=False)),
+            ("Archive", "Archived", repo.set_archived),
+            ("Delete", "Deleted", repo.delete),
+        ]
+    selected = show_admin_grid(repo, "messages", actions, view=view, placeholder="Name, email or text")
+    
+    if len(selected) == 1:
+        message = repo.get(selected[0])
+        if message is not None:
+            # Visitor text, name and email included, is shown verbatim, never interpreted as markdown
+            st.text(f"From: {message['name']} ({message['email']}) · {message['created_at']}")
+            st.text(message['message'])
+    
+    st.markdown("#### Retention")
+    st.caption(f"Messages older than {MESSAGE_RETENTION_DAYS} days (PORTFOLIO_MESSAGE_RETENTION_DAYS) move to "
+               f"gzipped JSONL files in `{MESSAGE_ARCHIVE_DIR}/`, checked at most hourly.")
+    if last_run:
+        st.caption(f"Last run moved {last_run[0]:,} messages to {last_run[1].name}.")
+    if st.button("Apply retention now"):
+        moved, path = repo.archive_older_than(MESSAGE_RETENTION_DAYS, MESSAGE_ARCHIVE_DIR)
+        st.session_state["contact_messages_grid_flash"] = (
+            f"Archived {moved:,} messages to {path.name}." if moved else "No messages are past the retention period.")
+        st.rerun()
+    archives = sorted(MESSAGE_ARCHIVE_DIR.glob("contact_messages-*.jsonl.gz"), reverse=True)
+    for archive in archives[:20]:
+        col1, col2 = st.columns([3, 1])
+        col1.write(f"{archive.name} · {archive.stat().st_size:,} bytes")
+        with col2:
+            st.download_button("Download", key=f"archive_{archive.name}", data=archive.read_bytes,
+                               file_name=archive.name, mime="application/gzip", on_click="ignore")
+
+def show_performance_tab():
+    st.markdown("### Rerun Performance")
+    if not perf.ENABLED:
+        st.info("Timing is disabled. Unset PORTFOLIO_PERF=0 and restart the server to collect spans.")
+        return
+    
+    rows = perf.summary()
+    st.caption(f"{perf.recorded():,} spans in a {perf.BUFFER_SIZE:,}-span buffer shared by all sessions")
+    if st.button("Reset timings"):
+        perf.reset()
+        st.rerun()
+    if not rows:
+        st.info("No spans recorded yet.")
+        return
+    
+    st.markdown("#### Reruns by page")
+    st.dataframe([row for row in rows if row['span'] == 'rerun'], width="stretch", hide_index=True)
+    st.markdown("#### All spans")
+    st.dataframe(rows, width="stretch", hide_index=True)
+
+def show_slow_query_tab():
+    query_log = get_db().query_log
+    st.markdown("### Slow Query Log")
+    st.caption(f"Statements taking {query_log.slow_ms:g} ms or more (PORTFOLIO_SLOW_QUERY_MS) are kept "
+               f"with their query plan; the last {query_log.recent.maxlen:,} statements are kept regardless.")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.download_button("Export slow queries (JSONL)", data=lambda: query_log.export_jsonl(slow_only=True),
+                           file_name="slow_queries.jsonl", mime="application/jsonl", on_click="ignore")
+    with col2:
+        st.download_button("Export recent statements (JSONL)", data=lambda: query_log.export_jsonl(slow_only=False),
+                           file_name="recent_queries.jsonl", mime="application/jsonl", on_click="ignore")
+    with col3:
+        if st.button("Clear query log"):
+            query_log.clear()
+            st.rerun()
+    
+    entries = query_log.entries(slow_only=True)
+    if not entries:
+        st.info("No slow queries recorded yet.")
+    else:
+        sql_filter = st.text_input("Filter by SQL or call site")
+        if sql_filter:
+            needle = sql_filter.lower()
+            entries = [e for e in entries if needle in e['sql'].lower() or needle in e['site'].lower()]
+        entries.sort(key=lambda e: e['ms'], reverse=True)
+        st.dataframe([{**e, 'ms': round(e['ms'], 2)} for e in entries], width="stretch", hide_index=True,
+                     column_order=['ms', 'rows', 'site', 'sql', 'plan', 'at'])
+    
+    st.markdown("#### Statements by call site")
+    by_site = {}
+    for e in query_log.entries():
+        site = by_site.setdefault(e['site'], {'site': e['site'], 'statements': 0, 'rows': 0, 'total_ms': 0.0})
+        site['statements'] += 1
+        site['rows'] += max(e['rows'], 0)
+        site['total_ms'] += e['ms']
+    sites = sorted(by_site.values(), key=lambda s: s['total_ms'], reverse=True)
+    st.dataframe([{**s, 'total_ms': round(s['total_ms'], 2)} for s in sites], width="stretch", hide_index=True)
+
+def show_bulk_tab():
+    st.markdown("### Bulk Import")
+    st.caption("JSONL (one object per line) or CSV with a header row. Projects need title, description and "
+               "technologies; blog posts need title and content. Other known columns are optional and "
+               "unknown ones are ignored, so exports can be imported back.")
+    
+    with st.form("bulk_import", clear_on_submit=True):
+        table = st.selectbox("Import into", list(bulk.IMPORT_SPECS), format_func=lambda t: t.replace('_', ' ').title())
+        upload = st.file_uploader("File", type=["jsonl", "csv"])
+        submitted = st.form_submit_button("Import")
+    
+    if submitted and upload is not None:
+        fmt = "csv" if upload.name.lower().endswith(".csv") else "jsonl"
+        progress = st.progress(0.0, text="Importing...")
         
-        conn = sqlite3.connect('portfolio.db')
-        cursor = conn.cursor()
-        cursor.execute('SELECT * FROM contact_messages ORDER BY created_at DESC')
-        messages = cursor.fetchall()
-        conn.close()
+        def report_progress(report):
+            # The upload is read as a stream, so the byte offset is the best progress measure
+            done = min(1.0, upload.tell() / max(upload.size, 1))
+            progress.progress(done, text=f"{report.inserted:,} rows imported, {report.failed:,} rejected")
         
-        if messages:
-            for message in messages:
-                msg_id, name, email, msg_content, created_at = message
-                
-                with st.expander(f"From: {name} ({email}) - {created_at}"):
-                    st.write(msg_content)
-                    
-                    if st.button(f"Delete Message", key=f"del_msg_{msg_id}"):
-                        conn = sqlite3.connect('portfolio.db')
-                        cursor = conn.cursor()
-                        cursor.execute('DELETE FROM contact_messages WHERE id = ?', (msg_id,))
-                        conn.commit()
-                        conn.close()
-                        st.success("Message deleted!")
-                        st.rerun()
+        report = bulk.import_records(
+            get_db(), bulk.IMPORT_SPECS[table], bulk.iter_records(upload, fmt),
+            after_chunk=get_repos().posts.index_imported if table == 'blog_posts' else None,
+            progress=report_progress,
+        )
+        progress.progress(1.0, text=f"Done: {report.inserted:,} of {report.read:,} rows imported")
+        if report.errors:
+            st.warning(f"{report.failed:,} rows were rejected"
+                       + (f" (first {len(report.errors):,} listed)" if report.failed > len(report.errors) else ""))
+            st.dataframe(report.errors, width="stretch", hide_index=True)
         else:
-            st.info("No messages yet.")
+            st.success(f"Imported {report.inserted:,} rows.")
+    
+    st.markdown("### Export")
+    for table in bulk.EXPORT_TABLES:
+        col1, col2, col3 = st.columns([2, 1, 1])
+        col1.markdown(f"**{table.replace('_', ' ').title()}**")
+        for col, fmt, mime in ((col2, "jsonl", "application/jsonl"), (col3, "csv", "text/csv")):
+            with col:
+                st.download_button(f"{fmt.upper()}", key=f"export_{table}_{fmt}",
+                                   data=lambda table=table, fmt=fmt: "".join(bulk.export_table(get_db(), table, fmt)),
+                                   file_name=f"{table}.{fmt}", mime=mime, on_click="ignore")
+    
+    st.markdown("### Static Site")
+    st.caption(f"Pre-renders Home, Projects, Blog and one page per post into `{SITE_DIR}/` for a file server or CDN. "
+               "Only pages whose rows changed since the last build are rendered again; "
+               "`python site_export.py` does the same from a shell or cron job.")
+    if st.button("Build static site"):
+        with st.spinner("Rendering static pages..."):
+            stats = export_static_site()
+        st.success(f"{stats['pages']:,} pages in {stats['seconds']} s: {stats['rendered']:,} rendered "
+                   f"({stats['written']:,} changed), {stats['skipped']:,} unchanged pages skipped, "
+                   f"{stats['removed']:,} removed")
 
 # Main navigation
+@perf.timed("rerun")
 def main():
+    perf.set_page(None)
     load_css()
     init_database()
+    # Started with the pool, so spill files a previous process left behind are replayed right away
+    # and excerpts of posts edited while the app was down are refreshed before any page shows them
+    get_contact_writer()
+    get_snapshots()
     
     # Create static directory if it doesn't exist
     Path("static").mkdir(exist_ok=True)
@@ -1251,7 +1530,10 @@ def main():
     else:
         pages.append("🔐 Admin Login")
     
-    selected_page = st.selectbox("Navigate", pages, label_visibility="collapsed")
+    # A ?post= link opens on the Blog page
+    start_page = st.session_state.setdefault('start_page', 2 if "post" in st.query_params else 0)
+    selected_page = st.selectbox("Navigate", pages, index=start_page, label_visibility="collapsed")
+    perf.set_page(selected_page)
     
     st.markdown("---")
     
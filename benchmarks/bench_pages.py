@@ -0,0 +1,210 @@
+"""Headless rerun benchmark for the portfolio pages.
+
+Seeds a scratch database at each scale factor with the app's own migrations,
+drives every page through Streamlit's AppTest and records p50/p95 rerun
+latency, SQL statements per rerun and the size of the rendered element tree.
+
+    python benchmarks/bench_pages.py --scale 1000 10000 100000 --output bench_results.json
+
+With --memory the databases are seeded and served in memory (memory://
+DSNs), which takes disk I/O out of the measurements.
+
+Results are written as sorted, indented JSON so two runs can be diffed.
+Statements answered from the shared query cache do not count as queries.
+"""
+import argparse
+import json
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import app
+import database
+import repository
+
+PAGES = {
+    'home': ('🏠 Home', False),
+    'projects': ('🚀 Projects', False),
+    'blog': ('📝 Blog', False),
+    'admin': ('🛠️ Admin Dashboard', True),
+}
+
+WORDS = ('model data training neural network transformer attention vision language agent '
+         'pipeline deployment inference gradient embedding retrieval evaluation latency '
+         'quantization kubernetes feature dataset tokenizer benchmark optimizer').split()
+TAGS = ['AI', 'ML', 'Deep Learning', 'NLP', 'Computer Vision', 'MLOps', 'LLM', 'RAG']
+
+_query_count = 0
+
+
+def _count_queries():
+    """Count every statement the app sends through ConnectionPool, in whichever pool instance it uses"""
+    execute = database.ConnectionPool.execute
+    executemany = database.ConnectionPool.executemany
+
+    def counted_execute(self, sql, params=()):
+        global _query_count
+        _query_count += 1
+        return execute(self, sql, params)
+
+    def counted_executemany(self, sql, seq_of_params):
+        global _query_count
+        _query_count += 1
+        return executemany(self, sql, seq_of_params)
+
+    database.ConnectionPool.execute = counted_execute
+    database.ConnectionPool.executemany = counted_executemany
+
+
+def _words(rng, count):
+    return ' '.join(rng.choice(WORDS) for _ in range(count))
+
+
+def seed_database(dsn, scale, seed=0):
+    """Create the schema exactly as the app does and fill it with `scale` rows per table"""
+    rng = random.Random(seed)
+    pool = database.open_pool(dsn)
+    database.migrate(pool, app.MIGRATIONS)
+
+    # Rendering is the slow part of seeding; a handful of bodies is enough variety
+    bodies = [f'## {_words(rng, 4).title()}\n\n{_words(rng, 60)}\n\n- {_words(rng, 6)}\n- {_words(rng, 6)}\n\n'
+              f'{_words(rng, 120)}' for _ in range(16)]
+    rendered = [app.render_post_excerpt(body) for body in bodies]
+
+    with pool.transaction() as conn:
+        conn.executemany(
+            'INSERT INTO projects (title, description, technologies, github_link, demo_link) VALUES (?, ?, ?, ?, ?)',
+            ((_words(rng, 3).title(), _words(rng, 40), ', '.join(rng.sample(TAGS, 3)),
+              'https://github.com/example/repo', 'https://example.com/demo') for _ in range(scale)))
+        conn.executemany(
+            'INSERT INTO contact_messages (name, email, message) VALUES (?, ?, ?)',
+            ((f'Visitor {i}', f'visitor{i}@example.com', _words(rng, 50)) for i in range(scale)))
+        for _ in range(scale):
+            body = rng.randrange(len(bodies))
+            tags = ', '.join(rng.sample(TAGS, 2))
+            post_id = conn.execute('INSERT INTO blog_posts (title, content, tags) VALUES (?, ?, ?)',
+                                   (_words(rng, 5).title(), bodies[body], tags)).lastrowid
+            repository.set_post_tags(conn, post_id, tags)
+            repository.store_post_excerpts(conn, [(*rendered[body], post_id)])
+    pool.close_all()
+
+
+def _tree_bytes(node):
+    """Serialized size and element count of a rendered AppTest subtree"""
+    children = getattr(node, 'children', None)
+    size = node.proto.ByteSize() if getattr(node, 'proto', None) is not None else 0
+    if children is None:
+        return size, 1
+    count = 1
+    for child in children.values():
+        child_size, child_count = _tree_bytes(child)
+        size += child_size
+        count += child_count
+    return size, count
+
+
+def bench_page(label, admin, runs, timeout, load_more=0):
+    at = AppTest.from_file(str(ROOT / 'app.py'), default_timeout=timeout)
+    if admin:
+        at.session_state['admin_logged_in'] = True
+    at.run()
+    navigation = at.selectbox[0]
+    navigation.select(label).run()
+    # Grow paginated lists first, so per-row rendering costs show up in the numbers
+    for _ in range(load_more):
+        more = [button for button in at.button if button.label == 'Load more']
+        if not more:
+            break
+        more[0].click().run()
+    if at.exception:
+        raise RuntimeError(f'{label}: {at.exception[0].value}')
+
+    latencies = []
+    queries = []
+    for _ in range(runs):
+        before = _query_count
+        started = time.perf_counter()
+        at.run()
+        latencies.append((time.perf_counter() - started) * 1000)
+        queries.append(_query_count - before)
+
+    payload_bytes, elements = _tree_bytes(at.main)
+    latencies.sort()
+    return {
+        'p50_ms': round(statistics.median(latencies), 2),
+        'p95_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))], 2),
+        'queries_per_rerun': round(statistics.mean(queries), 1),
+        'payload_bytes': payload_bytes,
+        'elements': elements,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='rows per table to seed (default: 1000 10000 100000)')
+    parser.add_argument('--pages', nargs='+', choices=list(PAGES), default=list(PAGES))
+    parser.add_argument('--runs', type=int, default=20, help='measured reruns per page')
+    parser.add_argument('--timeout', type=float, default=600, help='seconds allowed per rerun')
+    parser.add_argument('--load-more', type=int, default=0, help='"Load more" clicks before measuring')
+    parser.add_argument('--memory', action='store_true', help='use in-memory databases instead of files')
+    parser.add_argument('--output', default='bench_results.json')
+    args = parser.parse_args(argv)
+
+    output = os.path.abspath(args.output)
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    _count_queries()
+    os.chdir(ROOT)
+
+    results = []
+    with tempfile.TemporaryDirectory() as scratch:
+        for scale in args.scale:
+            dsn = f'memory://bench_{scale}' if args.memory else os.path.join(scratch, f'bench_{scale}.db')
+            print(f'Seeding {scale} rows per table...', flush=True)
+            seed_database(dsn, scale)
+            os.environ['PORTFOLIO_DSN'] = dsn
+            os.environ['PORTFOLIO_CONTACT_SPILL'] = os.path.join(scratch, f'spill_{scale}.jsonl')
+            st.cache_resource.clear()
+            for page in args.pages:
+                label, admin = PAGES[page]
+                result = bench_page(label, admin, args.runs, args.timeout, args.load_more)
+                result.update(scale=scale, page=page)
+                results.append(result)
+                print(f"  {page:9s} p50 {result['p50_ms']:9.1f} ms  p95 {result['p95_ms']:9.1f} ms  "
+                      f"{result['queries_per_rerun']:5.1f} queries  {result['payload_bytes']:>10,} bytes  "
+                      f"{result['elements']:>6} elements", flush=True)
+            st.cache_resource.clear()
+            if args.memory:
+                database.MemoryPool.drop(f'bench_{scale}')
+
+    report = {
+        'environment': {
+            'python': sys.version.split()[0],
+            'sqlite': sqlite3.sqlite_version,
+            'streamlit': st.__version__,
+            'runs': args.runs,
+            'load_more': args.load_more,
+            'backend': 'memory' if args.memory else 'sqlite',
+        },
+        'results': results,
+    }
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f'Wrote {output}')
+
+
+if __name__ == '__main__':
+    main()
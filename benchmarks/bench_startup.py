@@ -0,0 +1,161 @@
+"""Cold-start benchmark for the portfolio app.
+
+Every sample runs in a fresh interpreter, so nothing is already in sys.modules:
+
+- import time: `python -X importtime` over app.py's own top-level import
+  statements, with the cumulative cost of each top-level module
+- time to first render: from process launch to the end of the first AppTest
+  run of app.py, plus the warm rerun that follows it for comparison
+
+    python benchmarks/bench_startup.py --samples 5 --budget-ms 5000 --output bench_startup.json
+
+Exits with status 1 when a median exceeds --budget-ms or --import-budget-ms, so
+a cold-start regression fails the run. The app runs against a scratch copy of
+portfolio.db, and an untimed warm-up sample migrates it first.
+"""
+import argparse
+import ast
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / 'app.py'
+
+# Heavy modules the app defers to the code paths that need them
+DEFERRED = ['markdown', 'PIL']
+
+FIRST_RENDER = '''
+import json, logging, sys, time
+from streamlit.testing.v1 import AppTest
+logging.getLogger('streamlit').setLevel(logging.ERROR)
+at = AppTest.from_file(sys.argv[1], default_timeout=float(sys.argv[2]))
+started = time.perf_counter()
+at.run()
+first_run_ms = (time.perf_counter() - started) * 1000
+rendered_at = time.time()
+started = time.perf_counter()
+at.run()
+print(json.dumps({
+    'rendered_at': rendered_at,
+    'first_run_ms': first_run_ms,
+    'warm_rerun_ms': (time.perf_counter() - started) * 1000,
+    'exceptions': [e.value for e in at.exception],
+    'deferred_loaded': [name for name in sys.argv[3:] if name in sys.modules],
+}))
+'''
+
+
+def app_imports():
+    """app.py's top-level import statements, as a standalone script"""
+    tree = ast.parse(APP.read_text(encoding='utf-8'))
+    return '\n'.join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def measure_imports(script, exclude=()):
+    """Total and per-module cumulative import time in ms for one fresh interpreter"""
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', script], cwd=ROOT,
+                          capture_output=True, text=True, check=True)
+    modules = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|', 2)
+        # Nested imports are indented under their parent; keep the top level only
+        if (name.startswith(' ') and not name.startswith('  ') and cumulative.strip().isdigit()
+                and name.strip() not in exclude):
+            modules[name.strip()] = int(cumulative) / 1000
+    return sum(modules.values()), modules
+
+
+def measure_first_render(timeout, env):
+    launched = time.time()
+    proc = subprocess.run([sys.executable, '-c', FIRST_RENDER, str(APP), str(timeout), *DEFERRED],
+                          cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+    if result['exceptions']:
+        raise RuntimeError(f"first render raised: {result['exceptions'][0]}")
+    result['first_render_ms'] = (result.pop('rendered_at') - launched) * 1000
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--samples', type=int, default=5, help='fresh interpreters per measurement')
+    parser.add_argument('--timeout', type=float, default=120, help='seconds allowed for the first run')
+    parser.add_argument('--budget-ms', type=float, help='fail if median time to first render exceeds this')
+    parser.add_argument('--import-budget-ms', type=float, help='fail if median import time exceeds this')
+    parser.add_argument('--top', type=int, default=10, help='heaviest top-level imports to report')
+    parser.add_argument('--output', default='bench_startup.json')
+    args = parser.parse_args(argv)
+
+    script = app_imports()
+    # Modules the bare interpreter loads at startup are not the app's cost
+    _, interpreter = measure_imports('pass')
+    import_totals = []
+    per_module = {}
+    for _ in range(args.samples):
+        total, modules = measure_imports(script, exclude=interpreter)
+        import_totals.append(total)
+        for name, ms in modules.items():
+            per_module.setdefault(name, []).append(ms)
+    heaviest = sorted(((name, statistics.median(values)) for name, values in per_module.items()),
+                      key=lambda item: item[1], reverse=True)[:args.top]
+
+    renders = []
+    with tempfile.TemporaryDirectory() as scratch:
+        env = dict(os.environ,
+                   PORTFOLIO_DB=os.path.join(scratch, 'portfolio.db'),
+                   PORTFOLIO_CONTACT_SPILL=os.path.join(scratch, 'contact_spill.jsonl'))
+        if (ROOT / 'portfolio.db').exists():
+            shutil.copy(ROOT / 'portfolio.db', env['PORTFOLIO_DB'])
+        measure_first_render(args.timeout, env)
+        for _ in range(args.samples):
+            renders.append(measure_first_render(args.timeout, env))
+
+    report = {
+        'environment': {
+            'python': sys.version.split()[0],
+            'samples': args.samples,
+        },
+        'import_ms': round(statistics.median(import_totals), 1),
+        'heaviest_imports_ms': {name: round(ms, 1) for name, ms in heaviest},
+        'first_render_ms': round(statistics.median(r['first_render_ms'] for r in renders), 1),
+        'first_run_ms': round(statistics.median(r['first_run_ms'] for r in renders), 1),
+        'warm_rerun_ms': round(statistics.median(r['warm_rerun_ms'] for r in renders), 1),
+        'deferred_loaded_on_home': sorted({name for r in renders for name in r['deferred_loaded']}),
+    }
+
+    print(f"import          {report['import_ms']:8.1f} ms (median of {args.samples})")
+    for name, ms in report['heaviest_imports_ms'].items():
+        print(f'  {name:22s}{ms:8.1f} ms')
+    print(f"first render    {report['first_render_ms']:8.1f} ms from process launch")
+    print(f"  first run     {report['first_run_ms']:8.1f} ms")
+    print(f"  warm rerun    {report['warm_rerun_ms']:8.1f} ms")
+    if report['deferred_loaded_on_home']:
+        print(f"  deferred modules loaded by Home: {', '.join(report['deferred_loaded_on_home'])}")
+
+    output = os.path.abspath(args.output)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f'Wrote {output}')
+
+    failures = []
+    if args.budget_ms is not None and report['first_render_ms'] > args.budget_ms:
+        failures.append(f"first render {report['first_render_ms']} ms > budget {args.budget_ms:g} ms")
+    if args.import_budget_ms is not None and report['import_ms'] > args.import_budget_ms:
+        failures.append(f"import {report['import_ms']} ms > budget {args.import_budget_ms:g} ms")
+    for failure in failures:
+        print(f'OVER BUDGET: {failure}')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
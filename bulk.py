@@ -0,0 +1,190 @@
+"""Streaming bulk import and export of portfolio content.
+
+Uploads are parsed a record at a time and written in chunks of `chunk_size`
+rows, one executemany per chunk inside its own transaction, so memory stays
+flat and an import of thousands of rows takes a handful of commits. Rows that
+fail validation are reported by line number and skipped; they never abort the
+rest of the file.
+"""
+import csv
+import io
+import json
+import sqlite3
+from pathlib import Path
+
+from images import MEDIA_DIR
+
+CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+
+def _is_stored_original(path, media_dir=MEDIA_DIR):
+    originals = (Path(media_dir) / 'originals').resolve()
+    return Path(path).resolve().is_relative_to(originals)
+
+
+class ImportSpec:
+    """Columns a table accepts on import; `required` ones must be non-empty.
+
+    `image_columns` hold paths the app later opens and resizes into the public
+    media directory, so they must point inside the stored originals.
+    """
+
+    def __init__(self, table, required, optional, image_columns=()):
+        self.table = table
+        self.required = required
+        self.optional = optional
+        self.image_columns = image_columns
+        self.columns = required + optional
+        defaults = {'created_at': 'COALESCE(:created_at, CURRENT_TIMESTAMP)',
+                    'updated_at': 'COALESCE(:updated_at, :created_at, CURRENT_TIMESTAMP)'}
+        values = ', '.join(defaults.get(c, f':{c}') for c in self.columns)
+        self.sql = f'INSERT INTO {table} ({", ".join(self.columns)}) VALUES ({values})'
+
+    def params(self, record):
+        if not isinstance(record, dict):
+            raise ValueError('expected an object with named fields')
+        params = {}
+        for column in self.columns:
+            value = record.get(column)
+            if isinstance(value, str):
+                value = value.strip() or None
+            elif value is not None and not isinstance(value, (int, float)):
+                raise ValueError(f'{column} must be text')
+            if value is None and column in self.required:
+                raise ValueError(f'missing {column}')
+            if value is not None and column in self.image_columns:
+                if not isinstance(value, str) or not _is_stored_original(value):
+                    raise ValueError(f'{column} must be a path under {(Path(MEDIA_DIR) / "originals").as_posix()}/')
+            params[column] = value
+        return params
+
+
+IMPORT_SPECS = {
+    'projects': ImportSpec('projects', ['title', 'description', 'technologies'],
+                           ['image_path', 'github_link', 'demo_link', 'created_at'], image_columns=['image_path']),
+    'blog_posts': ImportSpec('blog_posts', ['title', 'content'],
+                             ['tags', 'featured_image', 'created_at', 'updated_at'],
+                             image_columns=['featured_image']),
+}
+
+# Content worth moving between databases; admin_users is left out so credentials never leave the server
+EXPORT_TABLES = ['projects', 'blog_posts', 'contact_messages']
+
+
+class ImportReport:
+    def __init__(self):
+        self.read = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'error': message})
+
+
+def iter_records(binary, fmt):
+    """Yield (line_number, record_or_exception) from an uploaded JSONL or CSV file, one row at a time"""
+    text = io.TextIOWrapper(binary, encoding='utf-8-sig', newline='')
+    try:
+        if fmt == 'csv':
+            reader = csv.DictReader(text)
+            try:
+                for record in reader:
+                    yield reader.line_num, record
+            except csv.Error as e:
+                yield reader.line_num, ValueError(f'malformed CSV: {e}')
+        else:
+            for line_number, line in enumerate(text, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield line_number, json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield line_number, ValueError(f'invalid JSON: {e.msg}')
+    except UnicodeDecodeError as e:
+        yield None, ValueError(f'file is not UTF-8: {e.reason}')
+    finally:
+        # Hand the upload back open; the caller owns it
+        text.detach()
+
+
+def import_records(pool, spec, records, after_chunk=None, progress=None, chunk_size=CHUNK_SIZE):
+    """Validate and insert `records` from iter_records() in chunked transactions.
+
+    `after_chunk(conn, first_new_id)` runs inside each chunk's transaction to
+    maintain derived data for the rows just written; `progress(report)` runs
+    after every commit.
+    """
+    report = ImportReport()
+    chunk = []
+    for line, record in records:
+        report.read += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            chunk.append((line, spec.params(record)))
+        except ValueError as e:
+            report.error(line, str(e))
+        if len(chunk) >= chunk_size:
+            _write_chunk(pool, spec, chunk, after_chunk, report)
+            chunk = []
+            if progress:
+                progress(report)
+    if chunk:
+        _write_chunk(pool, spec, chunk, after_chunk, report)
+    if progress:
+        progress(report)
+    return report
+
+
+def _write_chunk(pool, spec, chunk, after_chunk, report):
+    try:
+        _insert(pool, spec, chunk, after_chunk)
+        report.inserted += len(chunk)
+    except sqlite3.IntegrityError:
+        # Something in the chunk violates a constraint; find it row by row rather than drop the chunk
+        for line, params in chunk:
+            try:
+                _insert(pool, spec, [(line, params)], after_chunk)
+                report.inserted += 1
+            except sqlite3.IntegrityError as e:
+                report.error(line, str(e))
+
+
+def _insert(pool, spec, chunk, after_chunk):
+    with pool.transaction() as conn:
+        # The write lock is held from BEGIN IMMEDIATE, so every id above this one is ours
+        last_id = conn.execute(f'SELECT COALESCE(MAX(id), 0) FROM {spec.table}').fetchone()[0]
+        conn.executemany(spec.sql, [params for _, params in chunk])
+        if after_chunk:
+            after_chunk(conn, last_id + 1)
+
+
+def export_table(pool, table, fmt, batch_size=1000):
+    """Stream a table as JSONL or CSV text chunks, reading `batch_size` rows at a time"""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f'{table} cannot be exported')
+    cursor = pool.connection().execute(f'SELECT * FROM {table} ORDER BY id')
+    columns = [d[0] for d in cursor.description]
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if fmt == 'csv' else None
+    if writer:
+        writer.writerow(columns)
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        for row in rows:
+            if writer:
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False))
+                buffer.write('\n')
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,689 @@
+import atexit
+import json
+import logging
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from pathlib import Path
+
+from perf import span, timed
+
+DEFAULT_DB_PATH = 'portfolio.db'
+
+
+SLOW_QUERY_MS = float(os.environ.get('PORTFOLIO_SLOW_QUERY_MS', 50))
+_EXPLAINABLE = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE', 'WITH')
+_SKIPPED_FILES = (__file__, contextmanager.__code__.co_filename)
+
+
+def _call_site():
+    """file:line function of the first caller outside this module"""
+    frame = sys._getframe(2)
+    while frame is not None and (frame.f_code.co_filename in _SKIPPED_FILES
+                                 or frame.f_code.co_filename.endswith('perf.py')):
+        frame = frame.f_back
+    if frame is None:
+        return '?'
+    return f'{os.path.basename(frame.f_code.co_filename)}:{frame.f_lineno} {frame.f_code.co_name}'
+
+
+class QueryLog:
+    """Every recent statement with its duration, row count and call site.
+
+    Statements at or over `slow_ms` are also kept in a separate slow log together
+    with their EXPLAIN QUERY PLAN, captured on the same connection and parameters.
+    Parameters themselves are never stored, since they carry visitor data.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, max_recent=2000, max_slow=500):
+        self.slow_ms = slow_ms
+        self.recent = deque(maxlen=max_recent)
+        self.slow = deque(maxlen=max_slow)
+
+    def start(self, sql, ms, rows):
+        entry = {'sql': ' '.join(sql.split()), 'ms': ms, 'rows': rows, 'site': _call_site(),
+                 'at': time.strftime('%Y-%m-%d %H:%M:%S')}
+        self.recent.append(entry)
+        return entry
+
+    def check(self, entry, conn, params):
+        if entry['ms'] < self.slow_ms or 'plan' in entry:
+            return
+        entry['plan'] = None
+        if entry['sql'].lstrip().upper().startswith(_EXPLAINABLE) and params is not None:
+            try:
+                # The base class method bypasses tracing, so the EXPLAIN itself is not logged
+                plan = sqlite3.Connection.execute(conn, 'EXPLAIN QUERY PLAN ' + entry['sql'], params).fetchall()
+                entry['plan'] = '\n'.join(row[3] for row in plan)
+            except sqlite3.Error as e:
+                entry['plan'] = f'(plan unavailable: {e})'
+        self.slow.append(entry)
+
+    def entries(self, slow_only=False):
+        return list(self.slow if slow_only else self.recent)
+
+    def export_jsonl(self, slow_only=True):
+        return ''.join(json.dumps(entry) + '\n' for entry in self.entries(slow_only))
+
+    def clear(self):
+        self.recent.clear()
+        self.slow.clear()
+
+
+class TracedCursor(sqlite3.Cursor):
+    """Cursor that reports each statement to its connection's QueryLog"""
+
+    _trace = None
+
+    def execute(self, sql, params=()):
+        log = self.connection.query_log
+        if log is None:
+            return super().execute(sql, params)
+        start = time.perf_counter()
+        super().execute(sql, params)
+        ms = (time.perf_counter() - start) * 1000
+        entry = log.start(sql, ms, self.rowcount if self.description is None else 0)
+        self._trace = (entry, params)
+        log.check(entry, self.connection, params)
+        return self
+
+    def executemany(self, sql, seq_of_params):
+        log = self.connection.query_log
+        if log is None:
+            return super().executemany(sql, seq_of_params)
+        start = time.perf_counter()
+        super().executemany(sql, seq_of_params)
+        entry = log.start(sql, (time.perf_counter() - start) * 1000, self.rowcount)
+        log.check(entry, self.connection, None)
+        return self
+
+    def fetchall(self):
+        if self._trace is None:
+            return super().fetchall()
+        start = time.perf_counter()
+        rows = super().fetchall()
+        self._add_fetch(time.perf_counter() - start, len(rows))
+        return rows
+
+    def fetchone(self):
+        if self._trace is None:
+            return super().fetchone()
+        start = time.perf_counter()
+        row = super().fetchone()
+        self._add_fetch(time.perf_counter() - start, 0 if row is None else 1)
+        return row
+
+    def fetchmany(self, size=None):
+        if self._trace is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        start = time.perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        self._add_fetch(time.perf_counter() - start, len(rows))
+        return rows
+
+    def _add_fetch(self, seconds, rows):
+        # SQLite steps lazily, so for SELECTs most of the work happens here
+        entry, params = self._trace
+        entry['ms'] += seconds * 1000
+        entry['rows'] += rows
+        self.connection.query_log.check(entry, self.connection, params)
+
+
+class TracedConnection(sqlite3.Connection):
+    query_log = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        return self.cursor().executemany(sql, seq_of_params)
+
+
+class QueryCache:
+    """Bounded LRU of query results shared by every session.
+
+    Any write empties it. Results read while a write was committing are not
+    stored, so a reader can never put pre-write rows back after invalidation.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, key):
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return rows
+
+    def put(self, key, version, rows):
+        with self._lock:
+            if version != self.version:
+                return
+            self._entries[key] = rows
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+            self._stats['invalidations'] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['version'] = self.version
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+class ConnectionPool:
+    """Process-wide SQLite connection layer handing out one connection per thread.
+
+    Streamlit runs every session (and often every rerun) on its own thread, so
+    connections are keyed on the thread. When a thread finishes, its connection
+    is reclaimed by the next new thread instead of opening the file again.
+    """
+
+    uri = False
+
+    def __init__(self, path=DEFAULT_DB_PATH, busy_timeout=5000, cached_statements=256, max_idle=8,
+                 cache_size=512, slow_query_ms=SLOW_QUERY_MS):
+        self.path = path
+        self.busy_timeout = busy_timeout
+        self.cached_statements = cached_statements
+        self.max_idle = max_idle
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._owners = {}
+        self._idle = []
+        # A connection of its own that only reads PRAGMA data_version, and the last value it saw
+        self._version_lock = threading.Lock()
+        self._version_conn = None
+        self._data_version = None
+        self.cache = QueryCache(cache_size)
+        self.query_log = QueryLog(slow_query_ms)
+        # Called with no arguments after every outermost COMMIT
+        self.commit_listeners = []
+        self._stats = {
+            'created': 0,
+            'reused': 0,
+            'reclaimed': 0,
+            'closed': 0,
+            'queries': 0,
+            'transactions': 0,
+            'rollbacks': 0,
+        }
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.busy_timeout / 1000,
+            isolation_level=None,
+            check_same_thread=False,
+            cached_statements=self.cached_statements,
+            factory=TracedConnection,
+            uri=self.uri,
+        )
+        conn.query_log = self.query_log
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout)}')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute('PRAGMA foreign_keys=ON')
+        return conn
+
+    def _reclaim_dead(self):
+        # Caller holds self._lock
+        for ident, (thread, conn) in list(self._owners.items()):
+            if not thread.is_alive():
+                del self._owners[ident]
+                if conn.in_transaction:
+                    conn.rollback()
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                else:
+                    conn.close()
+                    self._stats['closed'] += 1
+
+    def connection(self):
+        """Return the calling thread's connection, creating or reclaiming one if needed"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            self._stats['reused'] += 1
+            return conn
+
+        with self._lock:
+            self._reclaim_dead()
+            if self._idle:
+                conn = self._idle.pop()
+                self._stats['reclaimed'] += 1
+            else:
+                conn = self._connect()
+                self._stats['created'] += 1
+            thread = threading.current_thread()
+            self._owners[thread.ident] = (thread, conn)
+
+        self._local.conn = conn
+        self._local.depth = 0
+        return conn
+
+    def execute(self, sql, params=()):
+        self._stats['queries'] += 1
+        with span('db.query'):
+            return self.connection().execute(sql, params)
+
+    def executemany(self, sql, seq_of_params):
+        self._stats['queries'] += 1
+        with span('db.query'):
+            return self.connection().executemany(sql, seq_of_params)
+
+    def fetchall(self, sql, params=()):
+        with span('db.fetch'):
+            return self.execute(sql, params).fetchall()
+
+    def fetchone(self, sql, params=()):
+        with span('db.fetch'):
+            return self.execute(sql, params).fetchone()
+
+    def _read_data_version(self):
+        # Caller holds self._version_lock
+        if self._version_conn is None:
+            # Not a pool connection: it never writes, so every commit, ours included, moves its data_version
+            self._version_conn = sqlite3.connect(self.path, timeout=self.busy_timeout / 1000, isolation_level=None,
+                                                 check_same_thread=False, uri=self.uri)
+        return self._version_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def check_data_version(self):
+        """Invalidate the query cache if a writer outside this pool has committed.
+
+        PRAGMA data_version on the pool's watch connection changes whenever any
+        other connection commits, so it also catches writers in other processes.
+        The pool's own commits re-read it before they invalidate the cache, so
+        they are not counted a second time here. The first check has no
+        baseline and invalidates conservatively.
+        """
+        with self._version_lock:
+            version = self._read_data_version()
+            changed = version != self._data_version
+            self._data_version = version
+        if changed:
+            self.cache.invalidate()
+
+    @timed('db.cached_fetch')
+    def cached_fetchall(self, sql, params=()):
+        """fetchall() through the shared query cache; the rows must be treated as read-only"""
+        self.check_data_version()
+        key = (sql, tuple(params))
+        rows = self.cache.get(key)
+        if rows is None:
+            version = self.cache.version
+            rows = self.fetchall(sql, params)
+            self.cache.put(key, version, rows)
+        return rows
+
+    @contextmanager
+    def transaction(self, immediate=True):
+        """Run the enclosed statements in one transaction.
+
+        The outermost block issues BEGIN (IMMEDIATE by default, so writers queue
+        on busy_timeout up front instead of failing on lock upgrade); nested
+        blocks become savepoints.
+        """
+        with span('db.transaction'):
+            conn = self.connection()
+            depth = self._local.depth
+            savepoint = f'sp_{depth}'
+            if depth:
+                conn.execute(f'SAVEPOINT {savepoint}')
+            else:
+                conn.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+                self._stats['transactions'] += 1
+            self._local.depth = depth + 1
+            try:
+                yield conn
+                if depth:
+                    conn.execute(f'RELEASE {savepoint}')
+                else:
+                    conn.execute('COMMIT')
+                    # Baseline first, then invalidate: commits by other processes before the
+                    # re-read are covered by this invalidation, later ones by check_data_version()
+                    with self._version_lock:
+                        self._data_version = self._read_data_version()
+                    self.cache.invalidate()
+                    for listener in self.commit_listeners:
+                        listener()
+            except BaseException:
+                if depth:
+                    conn.execute(f'ROLLBACK TO {savepoint}')
+                    conn.execute(f'RELEASE {savepoint}')
+                elif conn.in_transaction:
+                    conn.execute('ROLLBACK')
+                self._stats['rollbacks'] += 1
+                raise
+            finally:
+                self._local.depth = depth
+
+    @contextmanager
+    def read_transaction(self):
+        """Run several reads against one consistent state of the database.
+
+        A deferred BEGIN pins a WAL read snapshot at the first SELECT; nothing is
+        locked for writers and, unlike transaction(), the query cache is kept.
+        """
+        conn = self.connection()
+        if conn.in_transaction:
+            yield conn
+            return
+        conn.execute('BEGIN')
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.execute('COMMIT')
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['open'] = len(self._owners) + len(self._idle)
+            stats['idle'] = len(self._idle)
+        return stats
+
+    def close_all(self):
+        with self._lock:
+            conns = [conn for _, conn in self._owners.values()] + self._idle
+            self._owners.clear()
+            self._idle.clear()
+            for conn in conns:
+                conn.close()
+                self._stats['closed'] += 1
+        with self._version_lock:
+            if self._version_conn is not None:
+                self._version_conn.close()
+            self._version_conn = None
+            self._data_version = None
+        self._local = threading.local()
+        self.cache.invalidate()
+
+
+class MemoryPool(ConnectionPool):
+    """ConnectionPool over a named in-memory database, for tests and benchmarks that should not touch disk.
+
+    Every connection opens the same database through SQLite's memdb VFS, so
+    transactions, locking, triggers, FTS5 and PRAGMA data_version behave as they
+    do on a file. An anchor connection keeps each database alive for the life of
+    the process, so a pool created later under the same name sees the same data,
+    until drop() releases it.
+    """
+
+    uri = True
+    _anchors = {}
+    _anchors_lock = threading.Lock()
+
+    def __init__(self, name='portfolio', **options):
+        if not re.fullmatch(r'[\w.-]+', name):
+            raise ValueError(f'invalid in-memory database name {name!r}')
+        self.name = name
+        super().__init__(f'file:/{name}?vfs=memdb', **options)
+        with self._anchors_lock:
+            if name not in self._anchors:
+                self._anchors[name] = sqlite3.connect(self.path, uri=True, check_same_thread=False)
+
+    @classmethod
+    def drop(cls, name='portfolio'):
+        """Forget a database; it disappears once the pools still using it are closed"""
+        with cls._anchors_lock:
+            anchor = cls._anchors.pop(name, None)
+        if anchor is not None:
+            anchor.close()
+
+
+def _sqlite_backend(location, **options):
+    # sqlite:///relative.db and sqlite:////absolute.db, as in SQLAlchemy URLs
+    return ConnectionPool(location[1:] if location.startswith('/') else location or DEFAULT_DB_PATH, **options)
+
+
+def _memory_backend(location, **options):
+    return MemoryPool(location or 'portfolio', **options)
+
+
+# Storage backends by DSN scheme
+BACKENDS = {
+    'sqlite': _sqlite_backend,
+    'memory': _memory_backend,
+}
+
+
+def open_pool(dsn=DEFAULT_DB_PATH, **options):
+    """ConnectionPool for a DSN such as sqlite:///portfolio.db or memory://tests; a bare path means SQLite"""
+    scheme, separator, location = dsn.partition('://')
+    if not separator:
+        return ConnectionPool(dsn, **options)
+    if scheme not in BACKENDS:
+        raise ValueError(f'unknown storage backend {scheme!r}; expected one of {", ".join(BACKENDS)}')
+    return BACKENDS[scheme](location, **options)
+
+
+def migrate(pool, migrations):
+    """Apply the migrations the database has not seen yet, tracked in PRAGMA user_version.
+
+    Returns the number of steps applied. The steady state is a single PRAGMA read;
+    pending steps run in one BEGIN IMMEDIATE transaction, so concurrent processes
+    serialize and each step runs exactly once.
+    """
+    if pool.fetchone('PRAGMA user_version')[0] >= len(migrations):
+        return 0
+    with pool.transaction() as conn:
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for number, step in enumerate(migrations[version:], start=version + 1):
+            step(conn)
+            conn.execute(f'PRAGMA user_version = {number}')
+    return max(len(migrations) - version, 0)
+
+
+class BatchWriter:
+    """Queue rows in memory and insert them from a background thread in batches.
+
+    Every submitted row is first appended (and fsynced) to a JSONL spill file, so
+    nothing acknowledged is lost if the process dies before the batch commits.
+    At flush time the spill file is rotated aside and deleted once its rows are
+    committed. A segment whose write fails (the database locked past
+    busy_timeout, say) stays on disk and is retried by the writer thread with
+    exponential backoff; leftover spill files are replayed on start. Replays can
+    repeat rows that did commit, so `sql` must be idempotent (e.g. INSERT OR
+    IGNORE on a unique submission id).
+    """
+
+    def __init__(self, pool, sql, spill_path, max_queue=1000, batch_size=200, flush_interval=0.5,
+                 retry_seconds=0.5, max_retry_seconds=30.0):
+        self.pool = pool
+        self.sql = sql
+        self.spill_path = Path(spill_path)
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_seconds = retry_seconds
+        self.max_retry_seconds = max_retry_seconds
+        self._queue = []
+        self._cond = threading.Condition()
+        self._spill = None
+        self._segment = 0
+        self._thread = None
+        self._stopping = False
+        # Rotated segments waiting to be written again: [(path, rows)], oldest first
+        self._failed = []
+        self._retry_delay = 0.0
+        self._retry_at = 0.0
+        self._stats = {'submitted': 0, 'written': 0, 'batches': 0, 'rejected': 0, 'replayed': 0, 'errors': 0}
+
+    def start(self):
+        self.replay()
+        self._spill = open(self.spill_path, 'a', encoding='utf-8')
+        self._thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+        return self
+
+    def submit(self, params, timeout=0.2):
+        """Queue one row; returns False if the queue stays full for `timeout` seconds"""
+        line = json.dumps(list(params)) + '\n'
+        with self._cond:
+            if not self._cond.wait_for(lambda: len(self._queue) < self.max_queue or self._stopping, timeout):
+                self._stats['rejected'] += 1
+                return False
+            if self._stopping:
+                self._stats['rejected'] += 1
+                return False
+            self._spill.write(line)
+            self._spill.flush()
+            os.fsync(self._spill.fileno())
+            self._queue.append(params)
+            self._stats['submitted'] += 1
+            self._cond.notify_all()
+        return True
+
+    def _retry_due(self):
+        return bool(self._failed) and time.monotonic() >= self._retry_at
+
+    def _retry_wait(self):
+        return max(0.0, self._retry_at - time.monotonic()) if self._failed else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._queue or self._stopping or self._retry_due(), self._retry_wait())
+                if self._stopping and not self._queue:
+                    return
+                if self._queue:
+                    # Give concurrent submitters a moment to join this batch
+                    self._cond.wait_for(lambda: len(self._queue) >= self.batch_size or self._stopping,
+                                        self.flush_interval)
+            self.retry()
+            self.flush()
+
+    def _next_segment(self):
+        self._segment += 1
+        return self.spill_path.with_name(f'{self.spill_path.name}.{self._segment}.flushing')
+
+    def flush(self):
+        with self._cond:
+            if not self._queue:
+                return 0
+            batch, self._queue = self._queue, []
+            self._spill.close()
+            flushing = self._next_segment()
+            os.replace(self.spill_path, flushing)
+            self._spill = open(self.spill_path, 'a', encoding='utf-8')
+            self._cond.notify_all()
+        return self._write_segments([(flushing, batch)])
+
+    def retry(self, force=False):
+        """Write the segments earlier flushes failed on, once their backoff has passed"""
+        with self._cond:
+            if not self._failed or not (force or self._retry_due()):
+                return 0
+            segments, self._failed = self._failed, []
+        return self._write_segments(segments)
+
+    def _write_segments(self, segments):
+        written = 0
+        for index, (segment, rows) in enumerate(segments):
+            try:
+                self._write(rows)
+            except Exception:
+                self._stats['errors'] += 1
+                with self._cond:
+                    # Kept on disk and retried in order, so a restart can still replay them
+                    self._failed[:0] = segments[index:]
+                    self._retry_delay = min(self.max_retry_seconds, self._retry_delay * 2 or self.retry_seconds)
+                    self._retry_at = time.monotonic() + self._retry_delay
+                logging.getLogger(__name__).exception('Batch write of %d rows failed; retrying in %.1f s',
+                                                      len(rows), self._retry_delay)
+                return written
+            segment.unlink()
+            written += len(rows)
+        with self._cond:
+            if not self._failed:
+                self._retry_delay = 0.0
+        return written
+
+    def _write(self, rows):
+        for start in range(0, len(rows), self.batch_size):
+            chunk = rows[start:start + self.batch_size]
+            with self.pool.transaction() as conn:
+                conn.executemany(self.sql, chunk)
+            self._stats['written'] += len(chunk)
+            self._stats['batches'] += 1
+
+    def replay(self):
+        """Insert rows left in spill files by a previous process"""
+        pattern = re.compile(rf'{re.escape(self.spill_path.name)}\.(\d+)\.flushing')
+        numbered = []
+        for path in self.spill_path.parent.glob(f'{self.spill_path.name}.*.flushing'):
+            match = pattern.fullmatch(path.name)
+            if match:
+                numbered.append((int(match.group(1)), path))
+        numbered.sort()
+        # New segments are numbered after the leftovers, so none is overwritten while it waits
+        self._segment = numbered[-1][0] if numbered else 0
+        segments = [path for _, path in numbered]
+        if self.spill_path.exists():
+            # The live spill file is reopened for appending, so its rows move to a segment of their own
+            segments.append(self._next_segment())
+            os.replace(self.spill_path, segments[-1])
+        for segment in segments:
+            with open(segment, encoding='utf-8') as f:
+                # A crash mid-append can leave a torn last line; it was never acknowledged
+                rows = []
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+            self._stats['replayed'] += len(rows)
+            self._failed.append((segment, rows))
+        self.retry(force=True)
+
+    def close(self):
+        """Stop accepting rows and flush what is queued"""
+        with self._cond:
+            if self._stopping:
+                return
+            self._stopping = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        # One last attempt; whatever still fails stays on disk for the next start
+        self.retry(force=True)
+        if self._spill is not None:
+            self._spill.close()
+            if self.spill_path.exists() and self.spill_path.stat().st_size == 0:
+                self.spill_path.unlink()
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            stats['queued'] = len(self._queue)
+            stats['retrying'] = sum(len(rows) for _, rows in self._failed)
+        return stats
@@ -0,0 +1,214 @@
+"""Uploaded images and their resized variants, cached on disk by content hash.
+
+An original is stored once as media/originals/<digest>.<ext>, where the digest
+is the SHA-256 of the uploaded bytes, so re-uploading the same file costs
+nothing. Variants live next to it as media/<digest>_<width>.webp and .jpg and
+are rebuilt on demand if the cache directory is wiped. Pillow is imported
+lazily, because only the admin forms and the worker pool touch pixels.
+"""
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+MEDIA_DIR = Path('static') / 'media'
+VARIANT_WIDTHS = (320, 640, 1280)
+FORMATS = {'webp': {'quality': 80, 'method': 4}, 'jpg': {'quality': 82, 'optimize': True, 'progressive': True}}
+ACCEPTED_TYPES = ['png', 'jpg', 'jpeg', 'webp', 'gif']
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_PIXELS = 40_000_000
+
+
+class ImageError(ValueError):
+    """The upload is not an image Pillow can safely decode"""
+
+
+def _digest_of(image_path):
+    return Path(image_path).stem
+
+
+def store_original(data, media_dir=MEDIA_DIR):
+    """Validate uploaded bytes and store them once; returns the path to keep in the database"""
+    from PIL import Image, UnidentifiedImageError
+
+    if len(data) > MAX_UPLOAD_BYTES:
+        raise ImageError(f'Images are limited to {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.')
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise ImageError('Image dimensions are too large.')
+            image.verify()
+            ext = {'JPEG': 'jpg', 'PNG': 'png', 'WEBP': 'webp', 'GIF': 'gif'}.get(image.format)
+        # verify() does not decode pixel data, so a truncated file would only fail later in the workers
+        with Image.open(io.BytesIO(data)) as image:
+            image.load()
+    except (UnidentifiedImageError, OSError, SyntaxError, Image.DecompressionBombError) as e:
+        raise ImageError(f'Not a readable image: {e}') from e
+    if ext is None:
+        raise ImageError('Only PNG, JPEG, WebP and GIF images are accepted.')
+
+    path = Path(media_dir) / 'originals' / f'{hashlib.sha256(data).hexdigest()[:24]}.{ext}'
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(path.suffix + '.tmp')
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+    return path.as_posix()
+
+
+def variant_widths(width):
+    """Variant widths for an original `width` pixels wide; never upscales"""
+    widths = [w for w in VARIANT_WIDTHS if w < width]
+    if len(widths) < len(VARIANT_WIDTHS):
+        widths.append(width)
+    return widths
+
+
+def variant_path(image_path, width, fmt, media_dir=MEDIA_DIR):
+    return Path(media_dir) / f'{_digest_of(image_path)}_{width}.{fmt}'
+
+
+def _render_variant(image_path, width, fmt, media_dir):
+    from PIL import Image, ImageOps
+
+    target = variant_path(image_path, width, fmt, media_dir)
+    if target.exists():
+        return target
+    with Image.open(image_path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, round(image.height * width / image.width)), Image.LANCZOS)
+        if fmt == 'jpg':
+            if image.mode in ('RGBA', 'LA', 'P'):
+                rgba = image.convert('RGBA')
+                image = Image.new('RGB', rgba.size, (255, 255, 255))
+                image.paste(rgba, mask=rgba.getchannel('A'))
+            else:
+                image = image.convert('RGB')
+        # Re-encoding also drops EXIF metadata such as GPS coordinates
+        tmp = target.with_name(target.name + '.tmp')
+        image.save(tmp, format='JPEG' if fmt == 'jpg' else 'WEBP', **FORMATS[fmt])
+    os.replace(tmp, target)
+    return target
+
+
+class ThumbnailPool:
+    """Builds variants on a small thread pool; Pillow releases the GIL while resizing and encoding.
+
+    Concurrent requests for the same original share one set of futures, and the
+    variant list of each original is remembered so cards never stat the disk twice.
+    """
+
+    def __init__(self, media_dir=MEDIA_DIR, max_workers=None):
+        self.media_dir = Path(media_dir)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or min(4, os.cpu_count() or 1),
+                                            thread_name_prefix='thumbnails')
+        self._lock = threading.Lock()
+        self._pending = {}
+        self._ready = {}
+        self._failed = set()
+        self._stats = {'built': 0, 'failed': 0}
+
+    def _size_of(self, image_path):
+        """Displayed (width, height), or None when the file is not an image Pillow can read"""
+        from PIL import Image
+        try:
+            with Image.open(image_path) as image:
+                width, height = image.size
+                if image.getexif().get(0x0112) in (5, 6, 7, 8):
+                    # Rotated a quarter turn by its EXIF orientation
+                    width, height = height, width
+        except (OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+            return None
+        return width, height
+
+    def _mark_failed(self, image_path):
+        # Call with self._lock held; the card renders without an image from now on
+        if image_path not in self._failed:
+            self._failed.add(image_path)
+            self._stats['failed'] += 1
+
+    def submit(self, image_path):
+        """Start building every missing variant of `image_path`; returns the futures"""
+        with self._lock:
+            pending = self._pending.get(image_path)
+            if pending is not None:
+                return pending
+            size = self._size_of(image_path)
+            if size is None:
+                self._mark_failed(image_path)
+                return []
+            width, height = size
+            futures = [self._executor.submit(_render_variant, image_path, w, fmt, self.media_dir)
+                       for w in variant_widths(width) for fmt in FORMATS]
+            self._pending[image_path] = futures
+        for future in futures:
+            future.add_done_callback(lambda f, path=image_path, size=(width, height): self._done(path, size))
+        return futures
+
+    def _done(self, image_path, size):
+        with self._lock:
+            futures = self._pending.get(image_path)
+            if futures is None or not all(f.done() for f in futures):
+                return
+            del self._pending[image_path]
+            if any(f.exception() is not None for f in futures):
+                self._mark_failed(image_path)
+            else:
+                self._stats['built'] += 1
+                self._ready[image_path] = (size, variant_widths(size[0]))
+
+    def build(self, image_path, timeout=30):
+        """Build all variants and wait for them; used by the admin forms right after upload"""
+        try:
+            futures = self.submit(image_path)
+            for future in futures:
+                future.result(timeout=timeout)
+        except ImageError:
+            raise
+        except TimeoutError as e:
+            raise ImageError('Building the image variants took too long; please try again.') from e
+        except Exception as e:
+            raise ImageError(f'Could not process the image: {e}') from e
+        size = self._size_of(image_path) if futures else None
+        if size is None:
+            raise ImageError('Not a readable image.')
+        # Waiters wake before done-callbacks run, so settle the entry here rather than race them
+        self._done(image_path, size)
+        return self.variants(image_path)
+
+    def variants(self, image_path):
+        """((width, height), widths) once every variant is on disk, otherwise None.
+
+        Missing variants, for instance after the cache directory was cleared, are
+        queued in the background and the card renders without an image meanwhile.
+        """
+        ready = self._ready.get(image_path)
+        if ready is not None:
+            return ready
+        if not image_path or not os.path.exists(image_path):
+            return None
+        with self._lock:
+            if image_path in self._pending or image_path in self._failed:
+                return None
+        size = self._size_of(image_path)
+        if size is None:
+            with self._lock:
+                self._mark_failed(image_path)
+            return None
+        widths = variant_widths(size[0])
+        if all(variant_path(image_path, w, fmt, self.media_dir).exists() for w in widths for fmt in FORMATS):
+            with self._lock:
+                self._ready[image_path] = (size, widths)
+            return size, widths
+        self.submit(image_path)
+        return None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['pending'] = len(self._pending)
+            stats['ready'] = len(self._ready)
+        return stats
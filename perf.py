@@ -0,0 +1,97 @@
+"""Lightweight span timing shared by every session of the server process.
+
+Spans land in one bounded ring buffer as (name, page, milliseconds); the page is
+whatever the current thread's rerun last passed to set_page(). Set
+PORTFOLIO_PERF=0 to disable: span() then returns a shared no-op context manager
+and timed() functions call straight through.
+"""
+import functools
+import math
+import os
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import nullcontext
+
+ENABLED = os.environ.get('PORTFOLIO_PERF', '1') != '0'
+BUFFER_SIZE = 50000
+
+_spans = deque(maxlen=BUFFER_SIZE)
+_local = threading.local()
+_NOOP = nullcontext()
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        # deque.append is atomic, so concurrent sessions need no lock
+        _spans.append((self.name, getattr(_local, 'page', None), (time.perf_counter() - self.start) * 1000))
+        return False
+
+
+def span(name):
+    """Time the enclosed block under `name`"""
+    if not ENABLED:
+        return _NOOP
+    return _Span(name)
+
+
+def timed(name):
+    """Decorator form of span()"""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def set_page(page):
+    """Attribute the spans this thread records from now on to `page`"""
+    _local.page = page
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    return sorted_values[max(0, math.ceil(q * len(sorted_values)) - 1)]
+
+
+def summary():
+    """Per (page, span) call counts and p50/p95/p99/max in milliseconds, slowest p95 first"""
+    groups = defaultdict(list)
+    for name, page, ms in list(_spans):
+        groups[(page or '-', name)].append(ms)
+    rows = []
+    for (page, name), values in groups.items():
+        values.sort()
+        rows.append({
+            'page': page,
+            'span': name,
+            'calls': len(values),
+            'p50_ms': round(percentile(values, 0.50), 2),
+            'p95_ms': round(percentile(values, 0.95), 2),
+            'p99_ms': round(percentile(values, 0.99), 2),
+            'max_ms': round(values[-1], 2),
+            'total_ms': round(sum(values), 1),
+        })
+    rows.sort(key=lambda row: row['p95_ms'], reverse=True)
+    return rows
+
+
+def recorded():
+    return len(_spans)
+
+
+def reset():
+    _spans.clear()
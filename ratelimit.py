@@ -0,0 +1,86 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """Per-key token buckets: `burst` requests at once, refilled at `rate` per second.
+
+    Memory is bounded by `max_keys`; the least recently seen key is evicted first,
+    which at worst hands an evicted client a fresh, full bucket.
+    """
+
+    def __init__(self, rate, burst, max_keys=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.clock = clock
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'allowed': 0, 'limited': 0, 'evicted': 0}
+
+    def allow(self, key):
+        now = self.clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+                self._stats['evicted'] += 1
+            self._stats['allowed' if allowed else 'limited'] += 1
+        return allowed
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['keys'] = len(self._buckets)
+        return stats
+
+
+class DedupWindow:
+    """Remembers content digests for `ttl` seconds, bounded to `max_entries`"""
+
+    def __init__(self, ttl, max_entries=10000, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'duplicates': 0, 'evicted': 0}
+
+    def _expire(self, now):
+        # Entries are kept in insertion order, so expired ones are at the front
+        while self._seen:
+            digest, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.ttl:
+                break
+            self._seen.popitem(last=False)
+
+    def is_duplicate(self, digest):
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            duplicate = digest in self._seen
+            if duplicate:
+                self._stats['duplicates'] += 1
+        return duplicate
+
+    def remember(self, digest):
+        now = self.clock()
+        with self._lock:
+            self._seen.pop(digest, None)
+            self._seen[digest] = now
+            while len(self._seen) > self.max_entries:
+                self._seen.popitem(last=False)
+                self._stats['evicted'] += 1
+
+    def stats(self):
+        with self._lock:
+            self._expire(self.clock())
+            stats = dict(self._stats)
+            stats['entries'] = len(self._seen)
+        return stats
@@ -0,0 +1,292 @@
+"""Related-post recommendations from a TF-IDF index over title, tags and body.
+
+Posts are vectorised with a HashingVectorizer, which needs no fitted
+vocabulary, so a new post becomes a vector on its own. Title and tag terms
+weigh three and two times as much as body terms, much like the field weights
+of the search ranking. IDF weights are fixed when the index is built in full
+and reused for posts added later; once the posts added or removed since reach
+REBUILD_FRACTION of the index, it is rebuilt from scratch.
+
+The k nearest neighbours of every post by cosine similarity are precomputed,
+so related() is a dict lookup. Adding a post costs one sparse product against
+the index plus an update of the neighbour lists it enters; removing one
+recomputes only the lists it was on.
+
+Everything is saved to one .npz file, written under a temporary name and
+renamed into place. Loading the neighbour lists needs only numpy; scikit-learn
+and scipy are imported by the first sync, which runs on the index's own
+thread, so neither ever delays a visitor's rerun.
+"""
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+N_FEATURES = 2 ** 18
+FIELD_WEIGHTS = (('title', 3.0), ('tags', 2.0), ('content', 1.0))
+TOP_K = 5
+REBUILD_FRACTION = 0.25
+# Upper bound on similarity scores held in memory at once while computing neighbours
+SIMILARITY_BLOCK = 4_000_000
+FORMAT_VERSION = 1
+
+
+class RelatedIndex:
+    """Nearest-neighbour lists for every post, kept in step with blog_posts by sync()"""
+
+    def __init__(self, posts, path=None, k=TOP_K):
+        self.posts = posts
+        self.path = Path(path) if path else None
+        self.k = k
+        self._lock = threading.Lock()
+        self._schedule_lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='related-index')
+        self._pending = None
+        self._closed = False
+        self._stats = {'syncs': 0, 'rebuilds': 0, 'added': 0, 'removed': 0, 'failures': 0, 'sync_ms': 0.0}
+        self._reset()
+        if self.path is not None and self.path.exists():
+            try:
+                self._load()
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning('Ignoring unreadable related-post index %s: %s', self.path, e)
+                self._reset()
+        self._publish()
+
+    def related(self, post_id):
+        """((post_id, title), ...) of the posts most similar to `post_id`, best first"""
+        return self._related.get(post_id, ())
+
+    # Index state
+
+    def _reset(self):
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._versions = np.zeros(0, dtype=str)
+        self._titles = np.zeros(0, dtype=str)
+        self._neighbour_ids = np.full((0, self.k), -1, dtype=np.int64)
+        self._neighbour_scores = np.zeros((0, self.k), dtype=np.float32)
+        self._matrix = None
+        self._matrix_parts = None
+        self._idf = None
+        self._built_size = 0
+        self._changed = 0
+        self._related = {}
+
+    def _load(self):
+        with np.load(self.path, allow_pickle=False) as saved:
+            meta = saved['meta']
+            if tuple(meta[:3]) != (FORMAT_VERSION, N_FEATURES, self.k):
+                raise ValueError('written with other settings')
+            self._built_size, self._changed = int(meta[3]), int(meta[4])
+            self._ids = saved['ids']
+            self._versions = saved['versions']
+            self._titles = saved['titles']
+            self._neighbour_ids = saved['neighbour_ids']
+            self._neighbour_scores = saved['neighbour_scores']
+            self._idf = saved['idf']
+            # The matrix itself is assembled by the first sync, once scipy is imported there
+            self._matrix_parts = (saved['data'], saved['indices'], saved['indptr'])
+
+    def _save(self):
+        if self.path is None:
+            return
+        if self._idf is None:
+            self.path.unlink(missing_ok=True)
+            return
+        matrix = self._csr()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            np.savez(f, meta=np.array([FORMAT_VERSION, N_FEATURES, self.k, self._built_size, self._changed]),
+                     ids=self._ids, versions=self._versions, titles=self._titles,
+                     neighbour_ids=self._neighbour_ids, neighbour_scores=self._neighbour_scores,
+                     idf=self._idf, data=matrix.data, indices=matrix.indices, indptr=matrix.indptr)
+        os.replace(tmp, self.path)
+
+    def _csr(self):
+        if self._matrix is None:
+            from scipy import sparse
+            if self._matrix_parts is not None:
+                self._matrix = sparse.csr_matrix(self._matrix_parts, shape=(len(self._ids), N_FEATURES))
+                self._matrix_parts = None
+            else:
+                self._matrix = sparse.csr_matrix((len(self._ids), N_FEATURES), dtype=np.float32)
+        return self._matrix
+
+    def _publish(self):
+        # A new dict each time, so readers never see a half-updated one
+        titles = dict(zip(self._ids.tolist(), self._titles.tolist()))
+        self._related = {
+            post_id: tuple((other, titles[other]) for other in row if other >= 0)
+            for post_id, row in zip(self._ids.tolist(), self._neighbour_ids.tolist())
+        }
+
+    # Vectors
+
+    def _term_counts(self, rows):
+        from sklearn.feature_extraction.text import HashingVectorizer
+        vectorizer = HashingVectorizer(n_features=N_FEATURES, alternate_sign=False, norm=None,
+                                       stop_words='english', dtype=np.float32)
+        counts = None
+        for field, weight in FIELD_WEIGHTS:
+            field_counts = vectorizer.transform([row[field] or '' for row in rows]) * weight
+            counts = field_counts if counts is None else counts + field_counts
+        counts = counts.tocsr()
+        counts.data = np.log1p(counts.data)
+        return counts
+
+    def _weigh(self, counts):
+        from scipy import sparse
+        from sklearn.preprocessing import normalize
+        return normalize(counts @ sparse.diags(self._idf), copy=False).astype(np.float32).tocsr()
+
+    def _top_k(self, queries, rows):
+        """Neighbour ids and scores for query vectors whose own positions in the index are `rows`"""
+        matrix = self._csr()
+        ids = np.full((queries.shape[0], self.k), -1, dtype=np.int64)
+        scores = np.zeros((queries.shape[0], self.k), dtype=np.float32)
+        step = max(1, SIMILARITY_BLOCK // max(matrix.shape[0], 1))
+        for start in range(0, queries.shape[0], step):
+            block = (queries[start:start + step] @ matrix.T).toarray()
+            block[np.arange(block.shape[0]), rows[start:start + step]] = 0.0
+            take = min(self.k, block.shape[1])
+            if take == 0:
+                continue
+            best = np.argpartition(-block, take - 1, axis=1)[:, :take]
+            best_scores = np.take_along_axis(block, best, axis=1)
+            order = np.argsort(-best_scores, axis=1)
+            best = np.take_along_axis(best, order, axis=1)
+            best_scores = np.take_along_axis(best_scores, order, axis=1)
+            found = best_scores > 0
+            ids[start:start + step, :take] = np.where(found, self._ids[best], -1)
+            scores[start:start + step, :take] = np.where(found, best_scores, 0.0)
+        return ids, scores
+
+    # Updates
+
+    def _rebuild(self):
+        from scipy import sparse
+        ids, versions, titles, counts = [], [], [], []
+        for rows in self.posts.texts():
+            ids.extend(row['id'] for row in rows)
+            versions.extend(str(row['updated_at']) for row in rows)
+            titles.extend(row['title'] for row in rows)
+            counts.append(self._term_counts(rows))
+        if not ids:
+            # No posts: an empty index without IDF weights, built in full once posts appear again
+            self._reset()
+            self._stats['rebuilds'] += 1
+            return
+        counts = sparse.vstack(counts).tocsr()
+        document_frequency = np.bincount(counts.indices, minlength=N_FEATURES)
+        # Smoothed IDF, as TfidfTransformer computes it
+        self._idf = (np.log((1 + len(ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        self._ids = np.array(ids, dtype=np.int64)
+        self._versions = np.array(versions, dtype=str)
+        self._titles = np.array(titles, dtype=str)
+        self._matrix = self._weigh(counts)
+        self._matrix_parts = None
+        self._neighbour_ids, self._neighbour_scores = self._top_k(self._matrix, np.arange(len(ids)))
+        self._built_size, self._changed = len(ids), 0
+        self._stats['rebuilds'] += 1
+
+    def _remove(self, post_ids):
+        matrix = self._csr()
+        removed = np.isin(self._ids, post_ids)
+        keep = ~removed
+        self._matrix = matrix[keep]
+        self._ids, self._versions, self._titles = self._ids[keep], self._versions[keep], self._titles[keep]
+        self._neighbour_ids, self._neighbour_scores = self._neighbour_ids[keep], self._neighbour_scores[keep]
+        # Only the lists a removed post was on need computing again
+        affected = np.nonzero(np.isin(self._neighbour_ids, post_ids).any(axis=1))[0]
+        if len(affected):
+            ids, scores = self._top_k(self._matrix[affected], affected)
+            self._neighbour_ids[affected], self._neighbour_scores[affected] = ids, scores
+        self._changed += int(removed.sum())
+
+    def _add(self, rows):
+        from scipy import sparse
+        vectors = self._weigh(self._term_counts(rows))
+        existing = len(self._ids)
+        self._matrix = sparse.vstack([self._csr(), vectors]).tocsr()
+        self._ids = np.concatenate([self._ids, np.array([row['id'] for row in rows], dtype=np.int64)])
+        self._versions = np.concatenate([self._versions, np.array([str(row['updated_at']) for row in rows], dtype=str)])
+        self._titles = np.concatenate([self._titles, np.array([row['title'] for row in rows], dtype=str)])
+        new_rows = np.arange(existing, len(self._ids))
+        ids, scores = self._top_k(vectors, new_rows)
+        self._neighbour_ids = np.concatenate([self._neighbour_ids, ids])
+        self._neighbour_scores = np.concatenate([self._neighbour_scores, scores])
+
+        # Older posts take a new post into their list when it beats their weakest neighbour
+        step = max(1, SIMILARITY_BLOCK // max(existing, 1))
+        for start in range(0, len(rows) if existing else 0, step):
+            similarity = (self._matrix[:existing] @ vectors[start:start + step].T).toarray()
+            for column, post_id in enumerate(self._ids[new_rows[start:start + step]]):
+                candidates = np.nonzero(similarity[:, column] > self._neighbour_scores[:existing, -1])[0]
+                if not len(candidates):
+                    continue
+                merged_ids = np.concatenate([self._neighbour_ids[candidates],
+                                             np.full((len(candidates), 1), post_id)], axis=1)
+                merged_scores = np.concatenate([self._neighbour_scores[candidates],
+                                                similarity[candidates, column:column + 1]], axis=1)
+                order = np.argsort(-merged_scores, axis=1, kind='stable')[:, :self.k]
+                self._neighbour_ids[candidates] = np.take_along_axis(merged_ids, order, axis=1)
+                self._neighbour_scores[candidates] = np.take_along_axis(merged_scores, order, axis=1)
+        self._changed += len(rows)
+
+    def sync(self):
+        """Bring the index in line with blog_posts; returns the number of posts added and removed"""
+        with self._lock:
+            started = time.perf_counter()
+            current = {row['id']: str(row['updated_at']) for row in self.posts.versions()}
+            indexed = dict(zip(self._ids.tolist(), self._versions.tolist()))
+            # An edited post is removed and added again
+            stale = [post_id for post_id, version in indexed.items() if current.get(post_id) != version]
+            fresh = [post_id for post_id, version in current.items() if indexed.get(post_id) != version]
+            if not stale and not fresh and (self._idf is not None or not current):
+                return 0
+            if self._idf is None or self._changed + len(stale) + len(fresh) > REBUILD_FRACTION * self._built_size:
+                self._rebuild()
+            else:
+                if stale:
+                    self._remove(stale)
+                for rows in self.posts.texts(fresh):
+                    self._add(rows)
+            self._save()
+            self._publish()
+            self._stats['syncs'] += 1
+            self._stats['added'] += len(fresh)
+            self._stats['removed'] += len(stale)
+            self._stats['sync_ms'] = (time.perf_counter() - started) * 1000
+            return len(fresh) + len(stale)
+
+    def _sync_logged(self):
+        try:
+            self.sync()
+        except Exception:
+            self._stats['failures'] += 1
+            logger.exception('Related-post index sync failed; keeping the previous lists')
+
+    def schedule_sync(self, *args):
+        """Queue a sync on the index's own thread; a call while one is still queued is covered by it"""
+        with self._schedule_lock:
+            pending = self._pending
+            if self._closed or (pending is not None and not pending.running() and not pending.done()):
+                return
+            self._pending = self._executor.submit(self._sync_logged)
+
+    def close(self):
+        with self._schedule_lock:
+            self._closed = True
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['posts'] = len(self._related)
+        return stats
@@ -0,0 +1,437 @@
+"""Repositories: every query the app runs against its content, one class per table.
+
+Pages ask a repository for rows and never build SQL themselves. A repository
+wraps a ConnectionPool from database.open_pool(), so the same code runs on the
+SQLite file in production and on an in-memory database (memory://name) in tests
+and benchmarks. Public listings go through the pool's shared query cache, and
+every write is one transaction.
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from database import BatchWriter
+
+COUNTED_TABLES = ['projects', 'blog_posts', 'contact_messages', 'admin_users']
+
+SNIPPET_START = '\x02'
+SNIPPET_END = '\x03'
+
+
+def parse_tags(tags):
+    """Split a comma-separated tag string into unique, trimmed tags"""
+    seen = set()
+    result = []
+    for tag in (tags or '').split(','):
+        tag = tag.strip()
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            result.append(tag)
+    return result
+
+
+def set_post_tags(conn, post_id, tags):
+    """Replace the post_tags rows of a post; call inside the transaction that writes the post"""
+    conn.execute('DELETE FROM post_tags WHERE post_id = ?', (post_id,))
+    conn.executemany('''
+        INSERT INTO post_tags (tag, post_id, created_at)
+        SELECT ?, id, created_at FROM blog_posts WHERE id = ?
+    ''', [(tag, post_id) for tag in parse_tags(tags)])
+
+
+def store_post_excerpts(conn, rendered):
+    """Store (excerpt_html, word_count, reading_time, post_id) rows; call inside the transaction that wrote the posts"""
+    conn.executemany('''
+        UPDATE blog_posts
+        SET excerpt_html = ?, word_count = ?, reading_time = ?, excerpt_updated_at = updated_at
+        WHERE id = ?
+    ''', rendered)
+
+
+def refresh_post_excerpts(conn, render):
+    """Backfill excerpts and post_tags rows for posts that were never rendered or changed since"""
+    stale = conn.execute('''
+        SELECT id, content, tags FROM blog_posts
+        WHERE excerpt_html IS NULL OR excerpt_updated_at IS NOT updated_at
+    ''').fetchall()
+    for post_id, _, tags in stale:
+        set_post_tags(conn, post_id, tags)
+    store_post_excerpts(conn, [(*render(content), post_id) for post_id, content, _ in stale])
+    return len(stale)
+
+
+def build_fts_query(search_term):
+    """Turn free text into an FTS5 query: every word must match, as a prefix"""
+    words = re.findall(r'\w+', search_term)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _id_list(ids):
+    return ', '.join('?' * len(ids))
+
+
+class TableRepo:
+    """Admin grid queries shared by every table: one filtered page at a time, newest first"""
+
+    table = None
+    grid_columns = '*'
+    search_columns = []
+    # View name -> WHERE clause; each should match a partial index
+    views = {}
+
+    def __init__(self, pool):
+        self.pool = pool
+
+    def _filter(self, filter_text, view):
+        clauses, params = [], []
+        if view:
+            clauses.append(self.views[view])
+        if filter_text:
+            pattern = '%' + re.sub(r'([\\%_])', r'\\\1', filter_text) + '%'
+            clauses.append('(' + ' OR '.join(f"{c} LIKE ? ESCAPE '\\'" for c in self.search_columns) + ')')
+            params = [pattern] * len(self.search_columns)
+        return ('WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+    def count(self, filter_text=None, view=None):
+        if not filter_text and not view:
+            # Unfiltered totals come from the trigger-maintained counters rather than a table scan
+            return self.pool.fetchone('SELECT value FROM content_stats WHERE name = ?', (self.table,))[0]
+        where, params = self._filter(filter_text, view)
+        return self.pool.fetchone(f'SELECT COUNT(*) FROM {self.table} {where}', params)[0]
+
+    def grid_page(self, filter_text=None, page=1, page_size=25, view=None):
+        where, params = self._filter(filter_text, view)
+        return self.pool.cached_fetchall(f'''
+            SELECT {self.grid_columns} FROM {self.table} {where}
+            ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?
+        ''', (*params, page_size, (page - 1) * page_size))
+
+    def delete(self, ids):
+        """Delete many rows with one statement in one transaction; triggers keep FTS, tags and counters in step"""
+        with self.pool.transaction() as conn:
+            return conn.execute(f'DELETE FROM {self.table} WHERE id IN ({_id_list(ids)})', list(ids)).rowcount
+
+
+class ProjectsRepo(TableRepo):
+    table = 'projects'
+    grid_columns = 'id, title, substr(description, 1, 120) AS description, technologies, github_link, demo_link, created_at'
+    search_columns = ['title', 'description', 'technologies']
+
+    def page(self, limit=None, after=None):
+        """Newest projects first; pass the cursor() of the last row seen as `after` to get the next page"""
+        query = 'SELECT * FROM projects'
+        params = []
+        if after:
+            query += ' WHERE (created_at, id) < (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY created_at DESC, id DESC'
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+        return self.pool.cached_fetchall(query, params)
+
+    @staticmethod
+    def cursor(project):
+        return (project['created_at'], project['id'])
+
+    def all(self):
+        return self.pool.fetchall('SELECT * FROM projects ORDER BY created_at DESC, id DESC')
+
+    def add(self, title, description, technologies, image_path=None, github_link=None, demo_link=None):
+        with self.pool.transaction() as conn:
+            return conn.execute('''
+                INSERT INTO projects (title, description, technologies, image_path, github_link, demo_link)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (title, description, technologies, image_path, github_link, demo_link)).lastrowid
+
+
+class PostsRepo(TableRepo):
+    """Blog posts with their tag index and pre-rendered excerpts.
+
+    `render_excerpt(content)` returns (excerpt_html, word_count, reading_time);
+    it is passed in so this module never imports a markdown renderer.
+    """
+
+    table = 'blog_posts'
+    grid_columns = 'id, title, tags, substr(content, 1, 120) AS preview, reading_time, created_at, updated_at'
+    search_columns = ['title', 'tags']
+
+    def __init__(self, pool, render_excerpt):
+        super().__init__(pool)
+        self.render_excerpt = render_excerpt
+
+    def page(self, search_term=None, tag_filter=None, limit=None, after=None):
+        """Newest posts first, or best matches first when searching.
+
+        `after` is the cursor() of the last row of the previous page.
+        """
+        fts_query = build_fts_query(search_term) if search_term else ''
+        params = []
+
+        if fts_query:
+            query = f'''
+                SELECT blog_posts.*,
+                       snippet(blog_posts_fts, 1, '{SNIPPET_START}', '{SNIPPET_END}', '…', 32) AS snippet,
+                       blog_posts_fts.rank AS score
+                FROM blog_posts_fts
+                JOIN blog_posts ON blog_posts.id = blog_posts_fts.rowid
+                WHERE blog_posts_fts MATCH ?
+            '''
+            params.append(fts_query)
+            if tag_filter:
+                query += ' AND blog_posts.id IN (SELECT post_id FROM post_tags WHERE tag = ?)'
+                params.append(tag_filter)
+            if after:
+                query += ' AND (blog_posts_fts.rank, blog_posts.id) > (?, ?)'
+                params.extend(after)
+            query += ' ORDER BY blog_posts_fts.rank, blog_posts.id'
+        elif tag_filter:
+            # Walk the tag's own (created_at, post_id) index so common and rare tags both page cheaply
+            query = '''
+                SELECT blog_posts.*, NULL AS snippet, NULL AS score
+                FROM post_tags
+                JOIN blog_posts ON blog_posts.id = post_tags.post_id
+                WHERE post_tags.tag = ?
+            '''
+            params.append(tag_filter)
+            if after:
+                query += ' AND (post_tags.created_at, post_tags.post_id) < (?, ?)'
+                params.extend(after)
+            query += ' ORDER BY post_tags.created_at DESC, post_tags.post_id DESC'
+        else:
+            query = 'SELECT *, NULL AS snippet, NULL AS score FROM blog_posts'
+            if after:
+                query += ' WHERE (created_at, id) < (?, ?)'
+                params.extend(after)
+            query += ' ORDER BY created_at DESC, id DESC'
+
+        if limit:
+            query += ' LIMIT ?'
+            params.append(limit)
+
+        return self.pool.cached_fetchall(query, params)
+
+    @staticmethod
+    def cursor(post):
+        if post['score'] is not None:
+            return (post['score'], post['id'])
+        return (post['created_at'], post['id'])
+
+    def summaries(self):
+        """The small columns of every post, newest first; enough to tell whether a page built from it is stale"""
+        return self.pool.fetchall('''
+            SELECT id, title, tags, featured_image, created_at, updated_at, excerpt_updated_at, reading_time
+            FROM blog_posts ORDER BY created_at DESC, id DESC
+        ''')
+
+    def by_ids(self, ids):
+        if not ids:
+            return {}
+        return {row['id']: row for row in self.pool.fetchall(
+            f'SELECT *, NULL AS snippet FROM blog_posts WHERE id IN ({_id_list(ids)})', list(ids))}
+
+    def get(self, post_id):
+        return self.pool.fetchone('SELECT * FROM blog_posts WHERE id = ?', (post_id,))
+
+    def add(self, title, content, tags=None, featured_image=None):
+        """Insert a post together with its tag rows and excerpt, in one transaction"""
+        rendered = self.render_excerpt(content)
+        with self.pool.transaction() as conn:
+            post_id = conn.execute('''
+                INSERT INTO blog_posts (title, content, tags, featured_image)
+                VALUES (?, ?, ?, ?)
+            ''', (title, content, tags, featured_image)).lastrowid
+            set_post_tags(conn, post_id, tags)
+            store_post_excerpts(conn, [(*rendered, post_id)])
+        return post_id
+
+    def refresh_excerpts(self):
+        """Re-render excerpts and tag rows of posts written or edited outside the app; returns how many were stale"""
+        if self.pool.fetchone('''
+            SELECT 1 FROM blog_posts WHERE excerpt_html IS NULL OR excerpt_updated_at IS NOT updated_at LIMIT 1
+        ''') is None:
+            return 0
+        with self.pool.transaction() as conn:
+            return refresh_post_excerpts(conn, self.render_excerpt)
+
+    def versions(self):
+        """(id, updated_at) of every post, for indexes kept in step with the table"""
+        return self.pool.fetchall('SELECT id, updated_at FROM blog_posts')
+
+    def texts(self, ids=None, batch_size=500):
+        """Yield lists of (id, title, tags, content, updated_at) rows, for all posts or just `ids`"""
+        columns = 'id, title, tags, content, updated_at'
+        if ids is None:
+            cursor = self.pool.connection().execute(f'SELECT {columns} FROM blog_posts ORDER BY id')
+            while rows := cursor.fetchmany(batch_size):
+                yield rows
+            return
+        ids = list(ids)
+        for start in range(0, len(ids), batch_size):
+            chunk = ids[start:start + batch_size]
+            rows = self.pool.fetchall(f'SELECT {columns} FROM blog_posts WHERE id IN ({_id_list(chunk)})', chunk)
+            if rows:
+                yield rows
+
+    def index_imported(self, conn, first_id):
+        """Tags and excerpts for posts a bulk import just wrote, batched per import chunk"""
+        posts = conn.execute('SELECT id, content, tags FROM blog_posts WHERE id >= ?', (first_id,)).fetchall()
+        conn.executemany('''
+            INSERT OR IGNORE INTO post_tags (tag, post_id, created_at)
+            SELECT ?, id, created_at FROM blog_posts WHERE id = ?
+        ''', [(tag, post['id']) for post in posts for tag in parse_tags(post['tags'])])
+        store_post_excerpts(conn, [(*self.render_excerpt(post['content']), post['id']) for post in posts])
+
+
+class MessagesRepo(TableRepo):
+    table = 'contact_messages'
+    grid_columns = ("id, CASE WHEN read_at IS NULL THEN '●' ELSE '' END AS new, name, email, "
+                    "substr(message, 1, 120) AS message, created_at")
+    search_columns = ['name', 'email', 'message']
+    # Each view matches the WHERE clause of one partial index from migrate_message_inbox
+    views = {
+        'Inbox': 'archived_at IS NULL',
+        'Unread': 'read_at IS NULL AND archived_at IS NULL',
+        'Archived': 'archived_at IS NOT NULL',
+    }
+
+    def writer(self, spill_path):
+        """Background writer taking [name, email, message, created_at, submission_id] rows"""
+        return BatchWriter(self.pool, '''
+            INSERT OR IGNORE INTO contact_messages (name, email, message, created_at, submission_id)
+            VALUES (?, ?, ?, ?, ?)
+        ''', spill_path)
+
+    def get(self, message_id):
+        return self.pool.fetchone('SELECT * FROM contact_messages WHERE id = ?', (message_id,))
+
+    def count_unread(self):
+        return self.pool.fetchone('SELECT COUNT(*) FROM contact_messages WHERE read_at IS NULL AND archived_at IS NULL')[0]
+
+    def set_read(self, ids, read=True):
+        with self.pool.transaction() as conn:
+            return conn.execute(f'''
+                UPDATE contact_messages SET read_at = {'CURRENT_TIMESTAMP' if read else 'NULL'}
+                WHERE id IN ({_id_list(ids)}) AND (read_at IS NULL) = ?
+            ''', (*ids, read)).rowcount
+
+    def set_archived(self, ids, archived=True):
+        with self.pool.transaction() as conn:
+            return conn.execute(f'''
+                UPDATE contact_messages SET archived_at = {'CURRENT_TIMESTAMP' if archived else 'NULL'}
+                WHERE id IN ({_id_list(ids)}) AND (archived_at IS NULL) = ?
+            ''', (*ids, archived)).rowcount
+
+    def archive_older_than(self, days, archive_dir):
+        """Move messages older than `days` into a new archive file; returns (moved, path or None).
+
+        Rows are written, fsynced and only then deleted, all while the transaction
+        holds the write lock, so a message is never lost: a crash between the two
+        leaves it in both places and the next run archives it again.
+        """
+        cutoff = f'-{int(days)} days'
+        with self.pool.transaction() as conn:
+            last_id = conn.execute('''
+                SELECT MAX(id) FROM contact_messages WHERE created_at < datetime('now', ?)
+            ''', (cutoff,)).fetchone()[0]
+            if last_id is None:
+                return 0, None
+            archive_dir.mkdir(parents=True, exist_ok=True)
+            path = archive_dir / f"contact_messages-{datetime.now(timezone.utc):%Y%m%d-%H%M%S}.jsonl.gz"
+            tmp = path.with_name(path.name + '.tmp')
+            cursor = conn.execute('''
+                SELECT * FROM contact_messages WHERE created_at < datetime('now', ?) AND id <= ? ORDER BY id
+            ''', (cutoff, last_id))
+            columns = [d[0] for d in cursor.description]
+            moved = 0
+            with open(tmp, 'wb') as raw:
+                with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+                    while rows := cursor.fetchmany(1000):
+                        archive.write(''.join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + '\n'
+                                              for row in rows).encode())
+                        moved += len(rows)
+                raw.flush()
+                os.fsync(raw.fileno())
+            os.replace(tmp, path)
+            conn.execute('''
+                DELETE FROM contact_messages WHERE created_at < datetime('now', ?) AND id <= ?
+            ''', (cutoff, last_id))
+        return moved, path
+
+
+class UsersRepo:
+    def __init__(self, pool):
+        self.pool = pool
+
+    def authenticate(self, username, password):
+        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        result = self.pool.fetchone('SELECT id FROM admin_users WHERE username = ? AND password_hash = ?',
+                                    (username, password_hash))
+        return result is not None
+
+
+class Repositories:
+    """The four repositories over one pool, plus the cross-table figures of the admin Overview"""
+
+    def __init__(self, pool, render_excerpt):
+        self.pool = pool
+        self.projects = ProjectsRepo(pool)
+        self.posts = PostsRepo(pool, render_excerpt)
+        self.messages = MessagesRepo(pool)
+        self.users = UsersRepo(pool)
+
+    def content_version(self):
+        """Counter bumped by triggers on every write to projects or blog_posts"""
+        return self.pool.fetchone("SELECT value FROM content_stats WHERE name = 'content_version'")[0]
+
+    def public_content(self, max_rows, excerpt_length):
+        """What the public listings show, read in one transaction so it is mutually consistent.
+
+        Returns (content_version, projects, posts, post_tags, tag_counts, complete).
+        At most `max_rows` projects and posts are read, newest first; `complete`
+        says, per list, whether that was all of them. Post bodies are only kept
+        as the plain-text fallback of posts with no rendered excerpt, cut to
+        `excerpt_length`, and post_tags holds the (tag, post_id) pairs of the
+        posts read, newest first.
+        """
+        with self.pool.read_transaction() as conn:
+            version = self.content_version()
+            projects = conn.execute('''
+                SELECT * FROM projects ORDER BY created_at DESC, id DESC LIMIT ?
+            ''', (max_rows + 1,)).fetchall()
+            posts = conn.execute('''
+                SELECT id, title, tags, featured_image, created_at, updated_at,
+                       excerpt_html, excerpt_updated_at, word_count, reading_time,
+                       CASE WHEN excerpt_html IS NULL OR excerpt_updated_at IS NOT updated_at
+                            THEN substr(content, 1, ?) END AS content,
+                       NULL AS snippet, NULL AS score
+                FROM blog_posts ORDER BY created_at DESC, id DESC LIMIT ?
+            ''', (excerpt_length, max_rows + 1)).fetchall()
+            complete = (len(projects) <= max_rows, len(posts) <= max_rows)
+            projects, posts = projects[:max_rows], posts[:max_rows]
+            oldest = (posts[-1]['created_at'], posts[-1]['id']) if posts else ('', 0)
+            post_tags = conn.execute('''
+                SELECT tag, post_id FROM post_tags WHERE (created_at, post_id) >= (?, ?)
+                ORDER BY created_at DESC, post_id DESC
+            ''', oldest).fetchall()
+            tag_counts = conn.execute('''
+                SELECT tag, COUNT(*) AS posts FROM post_tags
+                GROUP BY tag ORDER BY posts DESC, tag
+            ''').fetchall()
+        return version, projects, posts, post_tags, tag_counts, complete
+
+    def content_stats(self):
+        """Table sizes and recent activity, in one query"""
+        counts = ', '.join(f"(SELECT value FROM content_stats WHERE name = '{table}') AS {table}"
+                           for table in COUNTED_TABLES)
+        return dict(self.pool.fetchone(f'''
+            SELECT {counts},
+                   (SELECT COUNT(*) FROM contact_messages
+                    WHERE created_at >= datetime('now', '-1 day')) AS messages_24h,
+                   (SELECT COUNT(*) FROM blog_posts
+                    WHERE created_at >= datetime('now', '-7 days')) AS posts_7d,
+                   (SELECT MAX(created_at) FROM contact_messages) AS last_message_at
+        '''))
@@ -0,0 +1,116 @@
+"""Incremental writer for the static export of the public pages.
+
+The manifest in the output directory records, for every page, a hash of the
+rows it was built from and a hash of the HTML that was written. A build asks
+fresh() before rendering and skips pages whose source is unchanged; pages that
+are rendered but come out byte-identical are not rewritten, so file mtimes and
+CDN caches stay put. Pages no longer produced are deleted at finish().
+
+    python site_export.py --out site --base /
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+
+MANIFEST = '.manifest.json'
+
+
+def source_hash(*parts):
+    """Stable hash of the values a page is built from"""
+    return hashlib.sha256(json.dumps(parts, default=str, separators=(',', ':')).encode()).hexdigest()[:16]
+
+
+class SiteWriter:
+    def __init__(self, out_dir, version):
+        self.out_dir = Path(out_dir)
+        self.version = version
+        self.started = time.perf_counter()
+        try:
+            manifest = json.loads((self.out_dir / MANIFEST).read_text(encoding='utf-8'))
+        except (FileNotFoundError, ValueError):
+            manifest = {}
+        # A new template version invalidates every page
+        self.previous = manifest.get('pages', {}) if manifest.get('version') == version else {}
+        self.pages = {}
+        self.stats = {'rendered': 0, 'written': 0, 'unchanged': 0, 'skipped': 0, 'removed': 0, 'assets': 0}
+
+    def fresh(self, path, source):
+        """True, and the page is kept as is with its assets, when it was last built from `source`"""
+        entry = self.previous.get(path)
+        if entry is None or entry['source'] != source or not (self.out_dir / path).exists():
+            return False
+        self.pages[path] = entry
+        for asset in entry.get('assets', ()):
+            self.pages[asset] = self.previous.get(asset, {'source': 'asset', 'html': None})
+        self.stats['skipped'] += 1
+        return True
+
+    def write(self, path, source, html, assets=()):
+        """Write a rendered page; `assets` are the static files it references, as paths relative to the site"""
+        for asset in assets:
+            self.copy(asset, asset)
+        digest = hashlib.sha256(html.encode()).hexdigest()[:16]
+        self.stats['rendered'] += 1
+        target = self.out_dir / path
+        entry = self.previous.get(path)
+        if entry is not None and entry['html'] == digest and target.exists():
+            self.stats['unchanged'] += 1
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            tmp = target.with_name(target.name + '.tmp')
+            tmp.write_text(html, encoding='utf-8')
+            os.replace(tmp, target)
+            self.stats['written'] += 1
+        self.pages[path] = {'source': source, 'html': digest, 'assets': sorted(assets)}
+
+    def copy(self, src, path):
+        """Copy a static file unless an identical-looking copy is already in place"""
+        target = self.out_dir / path
+        src_stat = os.stat(src)
+        try:
+            target_stat = target.stat()
+            current = target_stat.st_size == src_stat.st_size and target_stat.st_mtime >= src_stat.st_mtime
+        except FileNotFoundError:
+            current = False
+        if not current:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(src, target)
+            self.stats['assets'] += 1
+        self.pages[path] = {'source': 'asset', 'html': None}
+
+    def finish(self):
+        for path in set(self.previous) - set(self.pages):
+            (self.out_dir / path).unlink(missing_ok=True)
+            self.stats['removed'] += 1
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self.out_dir / (MANIFEST + '.tmp')
+        tmp.write_text(json.dumps({'version': self.version, 'pages': self.pages}, indent=1, sort_keys=True),
+                       encoding='utf-8')
+        os.replace(tmp, self.out_dir / MANIFEST)
+        self.stats['pages'] = sum(1 for entry in self.pages.values() if entry['source'] != 'asset')
+        self.stats['seconds'] = round(time.perf_counter() - self.started, 2)
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the public pages as static HTML')
+    parser.add_argument('--out', default=None, help='output directory (default: PORTFOLIO_SITE_DIR or site)')
+    parser.add_argument('--base', default='/', help='URL path the site is served under')
+    args = parser.parse_args(argv)
+
+    import logging
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    # Imported here: app.py imports this module for the admin dashboard
+    import app
+
+    app.init_database()
+    stats = app.export_static_site(args.out or app.SITE_DIR, base=args.base)
+    print(', '.join(f'{key} {value}' for key, value in stats.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Process-wide, read-only snapshot of the public content, shared by every session.
+
+Projects, the newest posts with their pre-rendered excerpts and the tag index
+are read in one transaction into tuples that are never modified afterwards.
+Public pages page through them with the same keyset cursors the repositories
+use, so a visitor's rerun runs no SQL at all.
+
+A watcher thread keeps the snapshot current. It polls PRAGMA data_version on a
+connection of its own, which changes whenever any other connection commits,
+and is woken at once by commits made through the pool. On a change it reads
+the content version counter kept by triggers, so commits that do not touch
+the public content (new contact messages, say) rebuild nothing. A new
+snapshot is built to the side and published with one reference assignment:
+readers never wait, and a reader holding the previous snapshot keeps a
+consistent view until its rerun ends.
+"""
+import bisect
+import logging
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+
+logger = logging.getLogger(__name__)
+
+
+def _key(row):
+    return (row['created_at'] or '', row['id'])
+
+
+def _page(rows, keys, complete, limit, after):
+    """Rows older than `after`, newest first, or None when the answer runs past a truncated list.
+
+    `rows` are newest first and `keys` are their (created_at, id) keys in
+    ascending order, so the cursor position is one bisection.
+    """
+    start = len(rows) - bisect.bisect_left(keys, tuple(after)) if after else 0
+    page = rows[start:start + limit] if limit else rows[start:]
+    if not complete and (not limit or len(page) < limit):
+        return None
+    return page
+
+
+class ContentSnapshot:
+    """Immutable view of the public content at one content version"""
+
+    def __init__(self, version, projects, posts, post_tags, tag_counts, complete, build_ms=0.0):
+        self.version = version
+        self.projects = tuple(projects)
+        self.posts = tuple(posts)
+        self.tag_counts = tuple(tuple(row) for row in tag_counts)
+        self.projects_complete, self.posts_complete = complete
+        self.build_ms = build_ms
+        self.built_at = time.time()
+        self._project_keys = tuple(_key(row) for row in reversed(self.projects))
+        self._post_keys = tuple(_key(row) for row in reversed(self.posts))
+        by_id = {post['id']: post for post in self.posts}
+        tagged = {}
+        for tag, post_id in post_tags:
+            if post_id in by_id:
+                # post_tags.tag is COLLATE NOCASE
+                tagged.setdefault(tag.lower(), []).append(by_id[post_id])
+        self._tags = MappingProxyType({
+            tag: (tuple(posts), tuple(_key(post) for post in reversed(posts))) for tag, posts in tagged.items()
+        })
+
+    def projects_page(self, limit=None, after=None):
+        """As ProjectsRepo.page(); None when the rows asked for are older than the snapshot holds"""
+        return _page(self.projects, self._project_keys, self.projects_complete, limit, after)
+
+    def posts_page(self, tag_filter=None, limit=None, after=None):
+        """As PostsRepo.page() without a search term; None when SQL has to answer"""
+        if tag_filter:
+            posts, keys = self._tags.get(tag_filter.lower(), ((), ()))
+            return _page(posts, keys, self.posts_complete, limit, after)
+        return _page(self.posts, self._post_keys, self.posts_complete, limit, after)
+
+
+class SnapshotStore:
+    """The current ContentSnapshot, and the thread that replaces it when the content changes"""
+
+    def __init__(self, repos, max_rows, excerpt_length, poll_seconds=1.0):
+        self.repos = repos
+        self.max_rows = max_rows
+        self.excerpt_length = excerpt_length
+        self.poll_seconds = poll_seconds
+        self._stats = {'builds': 0, 'failures': 0, 'skipped': 0}
+        # Called with each new snapshot after it is published, on the watcher thread; keep them quick
+        self.listeners = []
+        # The first snapshot is built before any page is served
+        self.snapshot = self._build()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        repos.pool.commit_listeners.append(self._wake.set)
+        self._thread = threading.Thread(target=self._run, name='content-snapshot', daemon=True)
+        self._thread.start()
+
+    def current(self):
+        """The latest published snapshot; never blocks and never queries"""
+        return self.snapshot
+
+    def _build(self):
+        started = time.perf_counter()
+        version, projects, posts, post_tags, tag_counts, complete = self.repos.public_content(
+            self.max_rows, self.excerpt_length)
+        snapshot = ContentSnapshot(version, projects, posts, post_tags, tag_counts, complete,
+                                   build_ms=(time.perf_counter() - started) * 1000)
+        self._stats['builds'] += 1
+        return snapshot
+
+    def _run(self):
+        pool = self.repos.pool
+        # Not a pool connection: polls stay out of the query log and its data_version sees every pool commit
+        watch = sqlite3.connect(pool.path, uri=pool.uri, check_same_thread=False)
+        data_version = None
+        try:
+            while not self._closed.is_set():
+                try:
+                    current = watch.execute('PRAGMA data_version').fetchone()[0]
+                    if current != data_version:
+                        data_version = current
+                        version = watch.execute(
+                            "SELECT value FROM content_stats WHERE name = 'content_version'").fetchone()[0]
+                        if version != self.snapshot.version:
+                            self.snapshot = self._build()
+                            for listener in self.listeners:
+                                try:
+                                    listener(self.snapshot)
+                                except Exception:
+                                    logger.exception('Content snapshot listener %r failed', listener)
+                        else:
+                            self._stats['skipped'] += 1
+                except Exception:
+                    self._stats['failures'] += 1
+                    logger.exception('Content snapshot rebuild failed; still serving version %s',
+                                     self.snapshot.version)
+                self._wake.wait(self.poll_seconds)
+                self._wake.clear()
+        finally:
+            watch.close()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        if self._wake.set in self.repos.pool.commit_listeners:
+            self.repos.pool.commit_listeners.remove(self._wake.set)
+
+    def stats(self):
+        snapshot = self.snapshot
+        stats = dict(self._stats)
+        stats.update(version=snapshot.version, projects=len(snapshot.projects), posts=len(snapshot.posts),
+                     complete=snapshot.projects_complete and snapshot.posts_complete,
+                     build_ms=snapshot.build_ms, age_seconds=time.time() - snapshot.built_at)
+        return stats